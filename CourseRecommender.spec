@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('combined_university_courses.csv', '.'), ('UK_University_Rankings_-_Full_Inclusive_List.csv', '.'), ('*.png', '.')],
+    datas=[('combined_university_courses.csv', '.'), ('course_index', 'course_index'), ('nltk_data', 'nltk_data'), ('UK_University_Rankings_-_Full_Inclusive_List.csv', '.'), ('*.png', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,268 @@
+"""
+Request and response shapes of the HTTP API.
+
+Profiles use the same shape the GUI collects in CourseRecommendationApp.data:
+
+    {
+        "interests": ["Computer Science", ...],
+        "hobbies": "...",
+        "strengths": ["Teamwork", ...],
+        "career_goals": "...",
+        "grades": [{"subject": "Maths", "grade": 1-6, "confidence": 0.75-1.5}, ...],
+        "preferences": {"durations": [...], "qualifications": [...], "study_modes": [...]},
+        "location": {"regions": [...], "universities": [...]},
+    }
+
+or {"paragraph": "..."} for a free-text query. Invalid input raises
+ValueError with a message fit to return to the client.
+
+A request may also set "limit" (results per page), "sort" ("compatibility"
+or "university") and "cursor": true to page through the rest of its
+results later (see result_cursors.py).
+
+The bulk endpoint takes the same profiles as newline-delimited JSON (one
+object per line) and answers with one JSON line per input line.
+"""
+import json
+import math
+
+from recommendation_engine import MATCHED_TERMS, SORT_COMPATIBILITY, SORT_ORDERS, UNRANKED
+from request_profiler import FORMATS, MAX_REQUESTS, MAX_SECONDS, MODES
+
+DEFAULT_LIMIT = 15
+MAX_LIMIT = 100
+MAX_LINE_BYTES = 64 * 1024  # Longest accepted NDJSON profile line
+MAX_PARAGRAPH_CHARS = 4000  # Longest paragraph query; also keeps its cursor within a request line
+
+TEXT_FIELDS = ["interests", "hobbies", "strengths", "career_goals"]
+PREFERENCE_FIELDS = ["durations", "qualifications", "study_modes"]
+LOCATION_FIELDS = ["regions", "universities"]
+GRADE_RANGE = (1, 6)  # PredictedGradesPage slider range
+CONFIDENCE_RANGE = (0.0, 2.0)  # Confidence factors are 0.75-1.5 in the GUI
+
+
+def string_list(value, field):
+    """A list of strings, also accepting a single string."""
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"'{field}' must be a string or a list of strings.")
+    return value
+
+
+def parse_grades(grades):
+    """Grade entries as PredictedGradesPage.collect_grades() produces them."""
+    if not isinstance(grades, list):
+        raise ValueError("'grades' must be a list of {\"grade\", \"confidence\"} objects.")
+
+    parsed = []
+    for position, entry in enumerate(grades):
+        if not isinstance(entry, dict):
+            raise ValueError(f"grades[{position}] must be an object.")
+        grade, confidence = entry.get("grade"), entry.get("confidence", 1.0)
+        if isinstance(grade, bool) or not isinstance(grade, int) or not GRADE_RANGE[0] <= grade <= GRADE_RANGE[1]:
+            raise ValueError(f"grades[{position}].grade must be an integer from {GRADE_RANGE[0]} to {GRADE_RANGE[1]}.")
+        if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) \
+                or not CONFIDENCE_RANGE[0] < confidence <= CONFIDENCE_RANGE[1]:
+            raise ValueError(f"grades[{position}].confidence must be a number in "
+                             f"({CONFIDENCE_RANGE[0]}, {CONFIDENCE_RANGE[1]}].")
+        parsed.append({"subject": str(entry.get("subject", "")), "grade": grade, "confidence": float(confidence)})
+    return parsed
+
+
+def parse_selection(value, field, keys):
+    """An object of string lists, e.g. "preferences" or "location"."""
+    if not isinstance(value, dict):
+        raise ValueError(f"'{field}' must be an object with {', '.join(keys)} lists.")
+    return {key: string_list(value.get(key, []), f"{field}.{key}") for key in keys}
+
+
+def parse_profile(data):
+    """
+    Validate a request body and convert it to the profile dict the engine expects.
+
+    Returns:
+        dict: A paragraph query ({"paragraph": text}) or a 7-stage profile.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object.")
+
+    if "paragraph" in data:
+        paragraph = data["paragraph"]
+        if not isinstance(paragraph, str) or not paragraph.strip():
+            raise ValueError("'paragraph' must be a non-empty string.")
+        if len(paragraph) > MAX_PARAGRAPH_CHARS:
+            raise ValueError(f"'paragraph' must be at most {MAX_PARAGRAPH_CHARS} characters.")
+        return {"paragraph": paragraph}
+
+    profile = {}
+    for field in TEXT_FIELDS:
+        if field in data:
+            values = string_list(data[field], field)
+            # The GUI stores chip selections as lists and free-text answers as strings
+            profile[field] = values if field in ("interests", "strengths") else " ".join(values)
+    if "grades" in data:
+        profile["grades"] = parse_grades(data["grades"])
+    if "preferences" in data:
+        profile["preferences"] = parse_selection(data["preferences"], "preferences", PREFERENCE_FIELDS)
+    if "location" in data:
+        profile["location"] = parse_selection(data["location"], "location", LOCATION_FIELDS)
+    return profile
+
+
+def parse_limit(value, default=DEFAULT_LIMIT):
+    """Number of results requested, from 1 to MAX_LIMIT."""
+    if value is None:
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("'limit' must be an integer.") from None
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"'limit' must be between 1 and {MAX_LIMIT}.")
+    return limit
+
+
+def parse_offset(value):
+    """Ranked position a page starts at."""
+    if value is None:
+        return 0
+    try:
+        offset = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("'offset' must be an integer.") from None
+    if offset < 0:
+        raise ValueError("'offset' must not be negative.")
+    return offset
+
+
+def parse_sort(value):
+    """Order of a page's results."""
+    if value is None:
+        return SORT_COMPATIBILITY
+    if value not in SORT_ORDERS:
+        raise ValueError(f"'sort' must be one of: {', '.join(SORT_ORDERS)}.")
+    return value
+
+
+def parse_flag(value, field):
+    """An optional boolean field."""
+    if value is None:
+        return False
+    if not isinstance(value, bool):
+        raise ValueError(f"'{field}' must be true or false.")
+    return value
+
+
+def parse_profile_capture(data):
+    """
+    Settings of an admin profile capture.
+
+    Returns:
+        tuple: (mode, number of requests or None, seconds or None, output format)
+    """
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object.")
+
+    mode = data.get("mode", MODES[0])
+    if mode not in MODES:
+        raise ValueError(f"'mode' must be one of: {', '.join(MODES)}.")
+    output_format = data.get("format", FORMATS[mode][0])
+    if output_format not in FORMATS[mode]:
+        raise ValueError(f"'format' must be one of: {', '.join(FORMATS[mode])} in {mode} mode.")
+
+    requests, seconds = data.get("requests"), data.get("seconds")
+    if requests is None and seconds is None:
+        raise ValueError("Give 'requests' (number of requests) or 'seconds' (capture length).")
+    if requests is not None and (isinstance(requests, bool) or not isinstance(requests, int)
+                                 or not 1 <= requests <= MAX_REQUESTS):
+        raise ValueError(f"'requests' must be an integer from 1 to {MAX_REQUESTS}.")
+    if seconds is not None and (isinstance(seconds, bool) or not isinstance(seconds, (int, float))
+                                or not 0 < seconds <= MAX_SECONDS):
+        raise ValueError(f"'seconds' must be a number in (0, {MAX_SECONDS}].")
+    return mode, requests, seconds, output_format
+
+
+def read_lines(stream, max_bytes=MAX_LINE_BYTES):
+    """
+    Lines of a binary stream, read incrementally; over-long lines come back as None.
+
+    Only one line is held in memory at a time, however large the stream is.
+    """
+    while True:
+        line = stream.readline(max_bytes + 1)
+        if not line:
+            return
+        if len(line) > max_bytes and not line.endswith(b"\n"):
+            # Skip the rest of the over-long line
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_bytes + 1)
+            yield None
+        else:
+            yield line
+
+
+def iter_ndjson_profiles(stream):
+    """
+    Parse an NDJSON stream of profiles lazily.
+
+    Yields:
+        tuple: (line number, client id or None, profile dict or None, error message or None).
+        Blank lines are skipped; every other line yields exactly once.
+    """
+    for line_number, line in enumerate(read_lines(stream), start=1):
+        if line is None:
+            yield line_number, None, None, f"Line is longer than {MAX_LINE_BYTES} bytes."
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, None, f"Invalid JSON: {error}"
+            continue
+
+        client_id = data.get("id") if isinstance(data, dict) else None
+        try:
+            yield line_number, client_id, parse_profile(data), None
+        except ValueError as error:
+            yield line_number, client_id, None, str(error)
+
+
+def optional_number(value):
+    """A JSON-safe number: None for NaN/missing values."""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def optional_text(value):
+    """A JSON-safe string: None for missing (NaN) catalog cells."""
+    return None if isinstance(value, float) and math.isnan(value) else str(value)
+
+
+def result_records(results):
+    """Convert a results DataFrame into JSON-serialisable records, best match first."""
+    columns = zip(
+        results["Course Title"], results["University Name"], results["similarity_score"], results["Rank"],
+        results["Duration"], results["Qualification"], results["Study Mode"], results["UCAS Tariff Points"],
+        results["Course URL"], results["Explanation"], results[MATCHED_TERMS]
+    )
+    return [
+        {
+            "course_title": optional_text(title),
+            "university": optional_text(university),
+            "score": round(float(score), 6),
+            "university_rank": None if int(rank) == UNRANKED else int(rank),
+            "duration": optional_text(duration),
+            "qualification": optional_text(qualification),
+            "study_mode": optional_text(study_mode),
+            "ucas_tariff_points": optional_number(tariff),
+            "course_url": optional_text(url),
+            "explanation": explanation,
+            "matched_terms": [{"term": term, "weight": round(float(weight), 6)} for term, weight in terms],
+        }
+        for title, university, score, rank, duration, qualification, study_mode, tariff, url, explanation, terms
+        in columns
+    ]
@@ -1,17 +1,378 @@
-from flask import Flask, render_template, request, jsonify
+"""
+HTTP API over the shared recommendation engine.
+
+POST /recommendation/recommend takes the profile shape the GUI collects (see
+api_schema.py) and returns ranked courses with scores, ranks, explanations
+and the query terms each course matched.
+
+POST /recommendation/bulk takes many profiles as newline-delimited JSON and
+streams newline-delimited results back while the upload is still arriving.
+Profiles are scored in fixed-size micro-batches, whose sparse products are
+split by estimated size, so memory stays bounded however many profiles are
+sent.
+
+Single-profile rankings are cached (see result_cache.py): in process, and in
+an SQLite file shared by all workers. GET /recommendation/cache reports the
+hit/miss counters. Concurrent single-profile requests in a worker are
+scored together in micro-batches, and identical in-flight queries are
+computed once (see request_batcher.py). The batching window is set by
+COURSE_RECOMMENDER_BATCH_WINDOW_MS, and GET /recommendation/batching reports
+the batch counters.
+
+A recommend request with "cursor": true also returns a cursor. GET
+/recommendation/page?cursor=...&offset=...&limit=...&sort=... then serves
+further pages, in either sort order, from the ranking computed for the
+first page instead of re-running the query (see result_cursors.py).
+
+POST /admin/profile profiles the next N requests, or T seconds of traffic,
+on the worker that receives it and returns a pstats file or collapsed stacks
+(see request_profiler.py). It needs the bearer token in
+COURSE_RECOMMENDER_ADMIN_TOKEN and answers 404 when that is unset.
+
+GET /metrics serves per-stage latency histograms and query counters in the
+Prometheus text format (see stage_metrics.py), for the worker answering it.
+
+The engine is loaded once per process, when the worker starts, on a
+background thread. /recommendation/ready answers 503 until the index is
+loaded, so a load balancer only routes traffic to warmed-up workers.
+
+In production run it under gunicorn with the bundled gunicorn.conf.py:
+
+    gunicorn -c gunicorn.conf.py app:app
+
+The config preloads the app. The master process loads the index once,
+before forking, so every worker shares the fitted index copy-on-write
+instead of loading its own copy.
+"""
+import hmac
+import json
+import os
+import threading
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+from api_schema import (
+    iter_ndjson_profiles, parse_flag, parse_limit, parse_offset, parse_profile, parse_profile_capture, parse_sort,
+    result_records
+)
+from recommendation_engine import SORT_UNIVERSITY, get_engine, loaded_engine, order_by_university
+from request_batcher import BATCH_WINDOW, QueryBatcher
+from result_cache import CACHE_PATH, ResultCache
+from request_profiler import ProfileCapture
+from result_cursors import CursorExpired, CursorStore
+from stage_metrics import METRIC_PREFIX, metrics, stage_timer
 
 app = Flask(__name__)
 
+BULK_BATCH_SIZE = 64  # Profiles per micro-batch in the bulk endpoint (products are also split by size)
+CACHE_PATH_ENV = "COURSE_RECOMMENDER_CACHE"  # SQLite file of the result cache; empty keeps it in memory only
+BATCH_WINDOW_ENV = "COURSE_RECOMMENDER_BATCH_WINDOW_MS"  # Micro-batching window; 0 disables batching
+ADMIN_TOKEN_ENV = "COURSE_RECOMMENDER_ADMIN_TOKEN"  # Bearer token for /admin endpoints; unset disables them
+
+_load_thread = None
+_load_error = None  # Exception raised by the last load attempt, if any
+_load_lock = threading.Lock()
+_result_cache = None
+_query_batcher = None
+_cursor_store = None
+
+
+def load_engine():
+    """Load the engine in the calling thread, recording (not raising) a failure."""
+    global _load_error
+    try:
+        get_engine()
+        _load_error = None
+    except Exception as error:  # Reported by /ready and the recommendation endpoints
+        _load_error = error
+        app.logger.exception("Loading the recommendation index failed")
+
+
+def start_engine_load():
+    """Start loading the engine on a daemon thread unless it is loaded or already loading."""
+    global _load_thread
+    with _load_lock:
+        if loaded_engine() is not None or (_load_thread is not None and _load_thread.is_alive()):
+            return
+        _load_thread = threading.Thread(target=load_engine, name="engine-loader", daemon=True)
+        _load_thread.start()
+
+
+def engine_status():
+    """One of "ready", "loading" or "failed"."""
+    if loaded_engine() is not None:
+        return "ready"
+    if _load_thread is None:
+        start_engine_load()  # Servers without the gunicorn hooks load on the first request
+        return "loading"
+    if _load_thread.is_alive():
+        return "loading"
+    return "failed" if _load_error is not None else "loading"
+
+
+def result_cache(engine):
+    """This process's result cache, recreated when the engine's artifact version changes."""
+    global _result_cache
+    with _load_lock:
+        if _result_cache is None or _result_cache.version != engine.version:
+            if _result_cache is not None:
+                _result_cache.close()
+            _result_cache = ResultCache(engine.version, os.environ.get(CACHE_PATH_ENV, CACHE_PATH) or None)
+        return _result_cache
+
+
+def query_batcher(engine):
+    """This process's request batcher, recreated along with the result cache."""
+    global _query_batcher
+    cache = result_cache(engine)
+    with _load_lock:
+        if _query_batcher is None or _query_batcher.cache is not cache:
+            window = float(os.environ.get(BATCH_WINDOW_ENV, BATCH_WINDOW * 1000)) / 1000
+            _query_batcher = QueryBatcher(engine, window, cache=cache)
+        return _query_batcher
+
+
+def cursor_store(engine):
+    """This process's result cursors, recreated when the engine's artifact version changes."""
+    global _cursor_store
+    with _load_lock:
+        if _cursor_store is None or _cursor_store.version != engine.version:
+            _cursor_store = CursorStore(engine)
+        return _cursor_store
+
+
+def page_response(ranked, cursor, offset, limit, sort):
+    """JSON body of one page of a cursor's results."""
+    total = len(ranked)
+    next_offset = offset + limit
+    results = ranked.page(offset, limit, sort)
+    with stage_timer("render"):
+        return jsonify({
+            "recommendations": result_records(results),
+            "total": total,
+            "cursor": cursor,
+            "offset": offset,
+            "next_offset": next_offset if next_offset < total else None,
+        })
+
+
+def unavailable(status):
+    """503 response for requests arriving before the engine is usable."""
+    body = {"status": status, "error": "The recommendation index is still loading."}
+    if status == "failed":
+        body["error"] = f"The recommendation index failed to load: {_load_error}"
+    response = jsonify(body)
+    response.status_code = 503
+    response.headers["Retry-After"] = "5"
+    return response
+
+
 @app.route('/recommendation', methods=['GET'])
 def home():
     return "Course Recommender API is running at /recommendation"
 
+
+@app.route('/recommendation/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once the index is loaded, 503 until then."""
+    status = engine_status()
+    if status != "ready":
+        return unavailable(status)
+    return jsonify({"status": status, "courses": len(loaded_engine().df)})
+
+
 @app.route('/recommendation/recommend', methods=['POST'])
 def get_recommendations():
-    data = request.get_json()
-    interests = data.get("interests", "")
-    # Dummy response - replace with your real logic
-    return jsonify({"message": f"Recommendations for {interests}"})
+    status = engine_status()
+    if status != "ready":
+        return unavailable(status)
+
+    data = request.get_json(silent=True)
+    try:
+        profile = parse_profile(data)
+        limit = parse_limit(data.get("limit"))
+        sort = parse_sort(data.get("sort"))
+        with_cursor = parse_flag(data.get("cursor"), "cursor")
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    engine = loaded_engine()
+    if with_cursor:
+        try:
+            cursor, ranked = cursor_store(engine).open(profile)
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
+        return page_response(ranked, cursor, 0, limit, sort)
+    results, total = query_batcher(engine).submit(profile, limit)
+    if sort == SORT_UNIVERSITY:
+        results = order_by_university(results)
+    with stage_timer("render"):
+        return jsonify({"recommendations": result_records(results), "total": total})
+
+
+@app.route('/recommendation/page', methods=['GET'])
+def get_page():
+    """Another page of a cursor's results, served from the ranking kept for it."""
+    status = engine_status()
+    if status != "ready":
+        return unavailable(status)
+
+    cursor = request.args.get("cursor", "")
+    try:
+        offset = parse_offset(request.args.get("offset"))
+        limit = parse_limit(request.args.get("limit"))
+        sort = parse_sort(request.args.get("sort"))
+        ranked = cursor_store(loaded_engine()).get(cursor)
+    except CursorExpired as error:
+        return jsonify({"error": str(error)}), 410
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+    return page_response(ranked, cursor, offset, limit, sort)
+
+
+@app.route('/recommendation/cursors', methods=['GET'])
+def cursor_stats():
+    """Result-cursor counters of the worker answering the request."""
+    engine = loaded_engine()
+    if engine is None:
+        return unavailable(engine_status())
+    return jsonify(cursor_store(engine).stats())
+
+
+@app.route('/recommendation/cache', methods=['GET'])
+def cache_stats():
+    """Result-cache hit/miss counters of the worker answering the request."""
+    engine = loaded_engine()
+    if engine is None:
+        return unavailable(engine_status())
+    return jsonify(result_cache(engine).stats())
+
+
+@app.route('/recommendation/batching', methods=['GET'])
+def batching_stats():
+    """Micro-batching counters of the worker answering the request."""
+    engine = loaded_engine()
+    if engine is None:
+        return unavailable(engine_status())
+    return jsonify(query_batcher(engine).stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Stage histograms and counters of the worker answering the request, for Prometheus."""
+    ready = f"# TYPE {METRIC_PREFIX}_engine_ready gauge\n{METRIC_PREFIX}_engine_ready {int(loaded_engine() is not None)}\n"
+    return Response(metrics.prometheus_text() + ready, mimetype="text/plain; version=0.0.4")
+
+
+def admin_error():
+    """Error response for an admin request without valid credentials, or None if it may proceed."""
+    token = os.environ.get(ADMIN_TOKEN_ENV, "")
+    if not token:
+        return jsonify({"error": "Not found."}), 404  # Admin endpoints are off unless a token is configured
+    scheme, _, supplied = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.encode(), token.encode()):
+        response = jsonify({"error": "A valid admin bearer token is required."})
+        response.status_code = 401
+        response.headers["WWW-Authenticate"] = "Bearer"
+        return response
+    return None
+
+
+@app.route('/admin/profile', methods=['POST'])
+def capture_profile():
+    """
+    Profile this worker's next requests and return the aggregated profile as a file.
+
+    JSON body: {"requests": N} or {"seconds": T} (both: N requests, waiting at most T
+    seconds), "mode": "deterministic" (default) or "sampling", and "format": "pstats"
+    (default) or "text" for deterministic captures, "collapsed" for sampling ones.
+    """
+    error = admin_error()
+    if error is not None:
+        return error
+    try:
+        mode, max_requests, seconds, output_format = parse_profile_capture(request.get_json(silent=True))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    capture = ProfileCapture(mode, max_requests, seconds)
+    try:
+        capture.run(app)
+    except RuntimeError as error:
+        return jsonify({"error": str(error)}), 409
+
+    data, mimetype, extension = capture.result(output_format)
+    summary = capture.summary()
+    response = Response(data, mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename=profile-{os.getpid()}.{extension}"
+    response.headers["X-Profile-Worker"] = str(os.getpid())
+    response.headers["X-Profile-Requests"] = str(summary["requests"])
+    response.headers["X-Profile-Samples"] = str(summary["samples"])
+    return response
+
+
+def bulk_result_lines(engine, lines, limit, batch_size=BULK_BATCH_SIZE):
+    """
+    NDJSON output for parsed input lines, produced one micro-batch at a time.
+
+    Each output line carries the input line number and the client's "id" (if any),
+    followed by either "recommendations" or an "error" for that line. Lines come
+    out in input order: invalid lines wait in the batch alongside the valid ones.
+    If scoring a batch fails, every line of that batch gets an error and the
+    stream carries on with the next batch.
+    """
+    batch = []  # (line number, client id, profile, error) in input order
+
+    def flush():
+        scored = [entry for entry in batch if entry[3] is None]
+        try:
+            results = engine.recommend_batch([profile for _, _, profile, _ in scored], k=limit) if scored else []
+            with stage_timer("render"):
+                records = {line_number: {"recommendations": result_records(result)}
+                           for (line_number, _, _, _), result in zip(scored, results)}
+        except Exception:
+            app.logger.exception("Scoring a bulk batch of %d profiles failed", len(scored))
+            records = {line_number: {"error": "Scoring failed for this batch; retry the line."}
+                       for line_number, _, _, _ in scored}
+        chunk = "".join(
+            json.dumps({"line": line_number, "id": client_id,
+                        **(records[line_number] if error is None else {"error": error})}) + "\n"
+            for line_number, client_id, _, error in batch
+        )
+        batch.clear()
+        return chunk
+
+    for entry in lines:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield flush()
+    if batch:
+        yield flush()
+
+
+@app.route('/recommendation/bulk', methods=['POST'])
+def bulk_recommendations():
+    """
+    Recommendations for a newline-delimited JSON stream of profiles.
+
+    Send profiles with Content-Type: application/x-ndjson (chunked uploads are fine);
+    the number of results per profile comes from the "limit" query parameter.
+    """
+    status = engine_status()
+    if status != "ready":
+        return unavailable(status)
+    try:
+        limit = parse_limit(request.args.get("limit"))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    lines = iter_ndjson_profiles(request.stream)
+    return Response(
+        stream_with_context(bulk_result_lines(loaded_engine(), lines, limit)),
+        mimetype="application/x-ndjson"
+    )
+
 
 if __name__ == '__main__':
+    start_engine_load()
     app.run(host='0.0.0.0', port=5000, debug=True)
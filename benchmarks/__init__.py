@@ -0,0 +1 @@
+"""Benchmarks of the recommendation pipeline on synthetic catalogs (see run.py)."""
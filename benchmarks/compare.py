@@ -0,0 +1,49 @@
+"""
+Compare two benchmark result files, e.g. from before and after a change.
+
+    python -m benchmarks.compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+
+Prints every stage both files measured, per catalog size, with the ratio
+new / old (below 1 is faster).
+"""
+import argparse
+import json
+
+
+def stage_values(result):
+    """Flat {stage: value} of one catalog size: build stages in seconds, query stages as mean ms."""
+    values = {f"build.{stage}": value for stage, value in result["build"].items() if stage.endswith("_s")}
+    values.update({f"query.{stage}": summary["mean_ms"] for stage, summary in result["query"].items()})
+    values["batch.mean_ms"] = result["batch"]["mean_ms"]
+    values["peak_rss_mb"] = result["peak_rss_mb"]
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    args = parser.parse_args()
+
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    print(f"old: {old['environment']['commit']}  new: {new['environment']['commit']}")
+
+    old_results = {result["rows"]: result for result in old["results"]}
+    for result in new["results"]:
+        if result["rows"] not in old_results:
+            continue
+        print(f"\n{result['rows']} rows")
+        old_values = stage_values(old_results[result["rows"]])
+        for stage, value in stage_values(result).items():
+            before = old_values.get(stage)
+            if before is None or value is None:
+                continue
+            ratio = value / before if before else float("inf")
+            print(f"  {stage:<24} {before:12.3f} -> {value:12.3f}  x{ratio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
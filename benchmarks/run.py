@@ -0,0 +1,269 @@
+"""
+Benchmark every stage of the recommendation pipeline on synthetic catalogs.
+
+    python -m benchmarks.run [--sizes 10000 100000 1000000] [--queries 200] [--output FILE]
+
+Run it from the repository root. Each catalog size runs in a fresh process,
+so its peak memory is its own. The stages timed are:
+
+- Build: ingest (CSV read), preprocess, fit (TF-IDF and posting lists), the
+  whole engine build, then saving and loading the index artifact.
+- Per query: encode, filter, score, top_k, join (catalog rows plus
+  rankings), explain, end-to-end recommend_top, and paragraph queries.
+- Batches: recommend_batch over micro-batches of profiles.
+
+Results are written as JSON, tagged with the git commit, so two runs can be
+compared with `python -m benchmarks.compare OLD NEW`. By default they go to
+benchmarks/results/.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_QUERIES = 200
+DEFAULT_BATCH_SIZE = 256
+TOP_K = 15
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, or None where the platform can't tell."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KiB elsewhere
+
+
+def timed(function, *args, **kwargs):
+    """(result, seconds) of a single call."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def summarize(seconds):
+    """Latency summary in milliseconds of a list of per-call timings."""
+    milliseconds = np.asarray(seconds) * 1000
+    return {
+        "calls": int(milliseconds.size),
+        "total_ms": round(float(milliseconds.sum()), 3),
+        "mean_ms": round(float(milliseconds.mean()), 4),
+        "p50_ms": round(float(np.percentile(milliseconds, 50)), 4),
+        "p95_ms": round(float(np.percentile(milliseconds, 95)), 4),
+        "p99_ms": round(float(np.percentile(milliseconds, 99)), 4),
+    }
+
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def benchmark_build(catalog_path, rankings_path, index_dir, workers):
+    """Time the offline stages; returns (engine loaded from the saved artifact, stage timings)."""
+    import pandas as pd
+
+    from inverted_index import InvertedIndex
+    from recommendation_engine import RecommendationEngine, make_vectorizer
+    from text_preprocessing import preprocess_many
+
+    stages = {}
+    catalog, stages["ingest_s"] = timed(pd.read_csv, catalog_path)
+    texts = (catalog["Course Title"].fillna("") + " " + catalog["Qualification"].fillna("") + " "
+             + catalog["University Name"].fillna(""))
+    cleaned, stages["preprocess_s"] = timed(preprocess_many, texts, workers=workers)
+
+    def fit():
+        matrix = make_vectorizer().fit_transform(cleaned)
+        return InvertedIndex.from_matrix(matrix)
+    _, stages["fit_s"] = timed(fit)
+
+    # The engine's own build repeats the above and adds the filters, groups and rank arrays
+    engine = RecommendationEngine(catalog_path, rankings_path, index_dir)
+    engine, stages["build_s"] = timed(engine.build, workers=workers)
+    _, stages["save_s"] = timed(engine.save)
+    stages["peak_rss_after_build_mb"] = peak_rss_mb()
+    del engine, catalog, texts, cleaned
+
+    loaded, stages["load_s"] = timed(RecommendationEngine(catalog_path, rankings_path, index_dir).load)
+    stages["index_bytes"] = directory_bytes(index_dir)
+    return loaded, {key: round(value, 4) if isinstance(value, float) else value for key, value in stages.items()}
+
+
+def benchmark_queries(engine, profiles, paragraphs):
+    """Per-stage latency of single 7-stage queries, mirroring RecommendationEngine.recommend."""
+    from recommendation_engine import MATCHED_TERMS
+
+    timings = {stage: [] for stage in ["encode", "filter", "score", "top_k", "join", "explain"]}
+    for profile in profiles:
+        query_vector, seconds = timed(engine.query_vector, profile)
+        timings["encode"].append(seconds)
+
+        rows, seconds = timed(engine.candidate_rows, profile)
+        timings["filter"].append(seconds)
+
+        def score():
+            allowed = np.zeros(len(engine.df), dtype=bool)
+            allowed[rows] = True
+            docs, matched_scores = engine.inverted.accumulate(query_vector, allowed)
+            return engine.rank_candidates(rows, docs, matched_scores, query_vector)
+        ranked, seconds = timed(score)
+        timings["score"].append(seconds)
+
+        (top_rows, top_scores), seconds = timed(ranked.ranked_rows, TOP_K)
+        timings["top_k"].append(seconds)
+
+        results, seconds = timed(engine.materialize, top_rows, top_scores)
+        timings["join"].append(seconds)
+
+        def explain():
+            results[MATCHED_TERMS] = engine.matched_terms(query_vector, top_rows)
+            return engine.profile_explainer(profile)(results)
+        _, seconds = timed(explain)
+        timings["explain"].append(seconds)
+
+    stages = {stage: summarize(seconds) for stage, seconds in timings.items()}
+    stages["end_to_end"] = summarize([timed(engine.recommend_top, profile, TOP_K)[1] for profile in profiles])
+    stages["paragraph"] = summarize(
+        [timed(engine.recommend_paragraph, paragraph, TOP_K)[1] for paragraph in paragraphs]
+    )
+    return stages
+
+
+def benchmark_batches(engine, profiles, batch_size):
+    """Throughput of recommend_batch over micro-batches of profiles."""
+    seconds = [
+        timed(engine.recommend_batch, profiles[start:start + batch_size], TOP_K)[1]
+        for start in range(0, len(profiles), batch_size)
+    ]
+    summary = summarize(seconds)
+    summary["batch_size"] = batch_size
+    summary["profiles_per_s"] = round(len(profiles) / sum(seconds), 2)
+    return summary
+
+
+def run_size(rows, queries, batch_size, workers, seed):
+    """All measurements for one catalog size, in this process."""
+    from benchmarks.synthetic_catalog import generate_catalog, generate_paragraphs, generate_profiles
+    from recommendation_engine import RANKINGS_PATH
+
+    rankings_path = os.path.join(REPO_ROOT, RANKINGS_PATH)
+    with tempfile.TemporaryDirectory(prefix="course-bench-") as directory:
+        catalog_path = os.path.join(directory, "catalog.csv")
+        generate_catalog(rows, seed, rankings_path).to_csv(catalog_path, index=False)
+
+        engine, build = benchmark_build(catalog_path, rankings_path, os.path.join(directory, "index"), workers)
+        profiles = generate_profiles(max(queries, batch_size), seed)
+        paragraphs = generate_paragraphs(queries, seed)
+
+        engine.recommend_top(profiles[0], TOP_K)  # Warm up lazily built structures
+        result = {
+            "rows": rows,
+            "terms": int(engine.tfidf_matrix.shape[1]),
+            "nonzeros": int(engine.tfidf_matrix.nnz),
+            "build": build,
+            "query": benchmark_queries(engine, profiles[:queries], paragraphs),
+            "batch": benchmark_batches(engine, profiles, batch_size),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    return result
+
+
+def git_commit():
+    """(commit hash, whether the tree has uncommitted changes), or (None, None) outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def environment():
+    import pandas as pd
+    import scipy
+    import sklearn
+
+    commit, dirty = git_commit()
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scipy": scipy.__version__,
+        "scikit_learn": sklearn.__version__,
+    }
+
+
+def print_summary(result):
+    build, query = result["build"], result["query"]
+    print(f"{result['rows']:>9} rows  {result['terms']} terms  build {build['build_s']:.1f}s  "
+          f"load {build['load_s']:.2f}s  peak {result['peak_rss_mb'] or 0:.0f} MB")
+    for stage, summary in query.items():
+        print(f"    {stage:<11} mean {summary['mean_ms']:8.3f} ms  p95 {summary['p95_ms']:8.3f} ms")
+    print(f"    batch       {result['batch']['profiles_per_s']:.0f} profiles/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation pipeline on synthetic catalogs.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalog sizes in rows")
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES, help="Profiles timed per size")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Profiles per recommend_batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Preprocessing processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file to write (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)  # Child process: one size
+    args = parser.parse_args()
+
+    if args.single:
+        result = run_size(args.sizes[0], args.queries, args.batch_size, args.workers, args.seed)
+        with open(args.output, "w") as file:
+            json.dump(result, file)
+        return
+
+    report = {"environment": environment(), "queries": args.queries, "seed": args.seed, "results": []}
+    for rows in args.sizes:
+        # A fresh process per size, so peak memory isn't inherited from a larger run
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as file:
+            child_output = file.name
+        try:
+            subprocess.run([
+                sys.executable, "-m", "benchmarks.run", "--single", "--sizes", str(rows),
+                "--queries", str(args.queries), "--batch-size", str(args.batch_size),
+                "--workers", str(args.workers), "--seed", str(args.seed), "--output", child_output,
+            ], cwd=REPO_ROOT, check=True)
+            with open(child_output) as file:
+                result = json.load(file)
+        finally:
+            os.remove(child_output)
+        print_summary(result)
+        report["results"].append(result)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{(report['environment']['commit'] or 'nogit')[:12]}.json")
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Synthetic course catalogs and questionnaire profiles for benchmarking.
+
+The catalog has the same columns as combined_university_courses.csv (see
+REQUIRED_COLUMNS in recommendation_engine.py) and mimics its shape:
+
+- Subject words with skewed popularity, plus a long tail of rare terms that
+  grows with the catalog.
+- Universities named as in the rankings file and the region lists.
+- Tariffs written as ranges, single values, or missing.
+- Some courses listed more than once under different durations or study modes.
+
+Everything is seeded, so a given size and seed always produce the same catalog.
+
+    python -m benchmarks.synthetic_catalog 100000 catalog.csv
+"""
+import argparse
+
+import numpy as np
+
+from recommendation_engine import REQUIRED_COLUMNS
+from regions import UNIVERSITY_REGIONS
+
+SUBJECTS = [
+    "Accounting", "Actuarial Science", "Aerospace Engineering", "Agriculture", "American Studies",
+    "Anatomy", "Ancient History", "Animal Science", "Animation", "Anthropology", "Archaeology",
+    "Architecture", "Art History", "Artificial Intelligence", "Astrophysics", "Audiology",
+    "Banking", "Biochemistry", "Biology", "Biomedical Science", "Business", "Chemical Engineering",
+    "Chemistry", "Civil Engineering", "Classics", "Climate Science", "Computer Science",
+    "Computing", "Counselling", "Creative Writing", "Criminology", "Cyber Security", "Dance",
+    "Data Science", "Dentistry", "Design", "Dietetics", "Drama", "Early Childhood", "Ecology",
+    "Economics", "Education", "Electrical Engineering", "Electronic Engineering", "English",
+    "English Literature", "Environmental Science", "Event Management", "Fashion", "Film",
+    "Finance", "Fine Art", "Food Science", "Forensic Science", "French", "Game Design",
+    "Genetics", "Geography", "Geology", "German", "Graphic Design", "Health Sciences", "History",
+    "Hospitality", "Human Resources", "Illustration", "International Relations", "Journalism",
+    "Law", "Linguistics", "Management", "Marine Biology", "Marketing", "Mathematics",
+    "Mechanical Engineering", "Media", "Medicine", "Microbiology", "Midwifery", "Music",
+    "Music Technology", "Neuroscience", "Nursing", "Nutrition", "Occupational Therapy",
+    "Optometry", "Paramedic Science", "Pharmacology", "Pharmacy", "Philosophy", "Photography",
+    "Physics", "Physiotherapy", "Politics", "Product Design", "Psychology", "Public Health",
+    "Radiography", "Religious Studies", "Robotics", "Social Work", "Sociology", "Software Engineering",
+    "Spanish", "Sport Science", "Statistics", "Surveying", "Theatre", "Theology", "Tourism",
+    "Urban Planning", "Veterinary Science", "Zoology",
+]
+MODIFIERS = [
+    "Applied", "Advanced", "Clinical", "Contemporary", "Digital", "Environmental", "Global",
+    "Integrated", "International", "Modern", "Professional", "Sustainable", "Theoretical",
+]
+CONNECTIVES = [" and ", " with ", " for "]
+QUALIFICATIONS = [
+    "BSc (Hons)", "BA (Hons)", "BEng (Hons)", "MEng", "LLB (Hons)", "MSc", "MA", "MRes", "PhD",
+    "FdSc", "HND", "PGCE",
+]
+DURATIONS = ["3 Years", "4 Years", "5+ Years", "1 Year", "2 Years"]
+STUDY_MODES = ["Full-time", "Part-time", "Distance learning"]
+TARIFF_VALUES = np.arange(64, 185, 8)
+SYLLABLES = ["ka", "lo", "mi", "ra", "te", "su", "no", "vi", "da", "pe", "ri", "zo", "an", "el", "or", "us"]
+DUPLICATE_SHARE = 0.05  # Courses listed again under another duration or study mode
+
+# Questionnaire answers, as the GUI pages offer them
+STRENGTHS = [
+    "Leadership", "Teamwork", "Problem-Solving", "Creativity", "Adaptability", "Empathy",
+    "Communication", "Critical Thinking", "Time Management", "Research Skills", "Analytical Thinking",
+]
+HOBBIES = [
+    "reading", "football", "painting", "coding", "playing guitar", "hiking", "photography",
+    "chess", "volunteering", "cooking", "gaming", "swimming", "writing stories",
+]
+CAREERS = [
+    "software engineer", "doctor", "teacher", "lawyer", "data scientist", "architect", "nurse",
+    "journalist", "civil engineer", "psychologist", "accountant", "game designer", "researcher",
+]
+
+
+def zipf_weights(count, exponent=1.1):
+    """Popularity weights for ranked items, most popular first."""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def rare_terms(count, rng):
+    """Made-up words for the long tail of the catalog's vocabulary."""
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES, size=rng.integers(3, 5))))
+    return sorted(words)
+
+
+def university_names(rankings_path=None):
+    """University names from the region lists, plus the rankings file when available."""
+    names = [name for names in UNIVERSITY_REGIONS.values() for name in names]
+    if rankings_path:
+        import pandas as pd
+
+        try:
+            rankings = pd.read_csv(rankings_path)
+            rankings.columns = rankings.columns.str.strip()
+            names += rankings["University"].dropna().astype(str).tolist()
+        except (FileNotFoundError, KeyError):
+            pass
+    return list(dict.fromkeys(names))
+
+
+def generate_catalog(rows, seed=0, rankings_path=None):
+    """
+    A synthetic course catalog.
+
+    Args:
+        rows (int): Number of course listings.
+        seed (int): Random seed.
+        rankings_path (str): Rankings CSV whose university names are reused.
+
+    Returns:
+        pandas.DataFrame: Catalog with the REQUIRED_COLUMNS.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    unique_rows = rows - int(rows * DUPLICATE_SHARE)
+
+    # Titles: one or two subjects, an optional modifier, and sometimes a rare specialism
+    subject_weights = zipf_weights(len(SUBJECTS))
+    first = rng.choice(len(SUBJECTS), size=unique_rows, p=subject_weights)
+    second = rng.choice(len(SUBJECTS), size=unique_rows, p=subject_weights)
+    shape = rng.random(unique_rows)
+    modifier = rng.choice(len(MODIFIERS), size=unique_rows)
+    connective = rng.choice(len(CONNECTIVES), size=unique_rows)
+    tail = rare_terms(max(50, int(20 * np.sqrt(rows))), rng)  # Vocabulary keeps growing with the catalog
+    specialism = rng.choice(len(tail), size=unique_rows, p=zipf_weights(len(tail), 0.8))
+    titles = []
+    for position in range(unique_rows):
+        title = SUBJECTS[first[position]]
+        if shape[position] < 0.35:
+            title += CONNECTIVES[connective[position]] + SUBJECTS[second[position]]
+        elif shape[position] < 0.55:
+            title = MODIFIERS[modifier[position]] + " " + title
+        if shape[position] > 0.8:
+            title += " (" + tail[specialism[position]].capitalize() + ")"
+        titles.append(title)
+
+    universities = university_names(rankings_path)
+    university = rng.choice(universities, size=unique_rows, p=zipf_weights(len(universities), 0.6))
+
+    # Tariffs: mostly ranges or single values, some missing
+    low = rng.choice(TARIFF_VALUES, size=unique_rows)
+    high = low + 8 * rng.integers(1, 5, size=unique_rows)
+    tariff_kind = rng.random(unique_rows)
+    tariffs = np.where(
+        tariff_kind < 0.45, np.char.add(np.char.add(low.astype(str), "-"), high.astype(str)),
+        np.where(tariff_kind < 0.8, low.astype(str), np.where(tariff_kind < 0.9, "", "N/A"))
+    )
+
+    catalog = pd.DataFrame({
+        "Course Title": titles,
+        "Qualification": rng.choice(QUALIFICATIONS, size=unique_rows, p=zipf_weights(len(QUALIFICATIONS), 0.9)),
+        "University Name": university,
+        "Duration": rng.choice(DURATIONS, size=unique_rows, p=[0.55, 0.2, 0.05, 0.15, 0.05]),
+        "Study Mode": rng.choice(STUDY_MODES, size=unique_rows, p=[0.8, 0.15, 0.05]),
+        "UCAS Tariff Points": tariffs,
+    })
+
+    # Re-list some courses under another duration or study mode
+    repeated = catalog.iloc[rng.integers(0, unique_rows, size=rows - unique_rows)].copy()
+    repeated["Duration"] = rng.choice(DURATIONS, size=len(repeated))
+    repeated["Study Mode"] = rng.choice(STUDY_MODES, size=len(repeated))
+    catalog = pd.concat([catalog, repeated], ignore_index=True)
+    catalog = catalog.iloc[rng.permutation(rows)].reset_index(drop=True)
+    catalog["Course URL"] = [f"https://courses.example.ac.uk/{position}" for position in range(rows)]
+    return catalog[REQUIRED_COLUMNS]
+
+
+def generate_profiles(count, seed=0):
+    """
+    Synthetic 7-stage questionnaire profiles, shaped like CourseRecommendationApp.data.
+
+    About half set course preferences and a third restrict the location.
+    """
+    rng = np.random.default_rng(seed + 1)
+    regions = list(UNIVERSITY_REGIONS)
+    subject_weights = zipf_weights(len(SUBJECTS))
+    profiles = []
+    for _ in range(count):
+        profile = {
+            "interests": [SUBJECTS[i] for i in rng.choice(len(SUBJECTS), size=rng.integers(1, 4),
+                                                          replace=False, p=subject_weights)],
+            "hobbies": " ".join(rng.choice(HOBBIES, size=2, replace=False)),
+            "strengths": rng.choice(STRENGTHS, size=3, replace=False).tolist(),
+            "career_goals": f"I want to become a {rng.choice(CAREERS)}",
+            "grades": [
+                {"subject": str(rng.choice(SUBJECTS)), "grade": int(rng.integers(1, 7)),
+                 "confidence": float(rng.choice([0.75, 1.0, 1.25, 1.5]))}
+                for _ in range(3)
+            ],
+            "preferences": {"durations": [], "qualifications": [], "study_modes": []},
+            "location": {"regions": [], "universities": []},
+        }
+        if rng.random() < 0.5:
+            profile["preferences"] = {
+                "durations": rng.choice(DURATIONS[:3], size=rng.integers(1, 3), replace=False).tolist(),
+                "qualifications": rng.choice(QUALIFICATIONS[:4], size=2, replace=False).tolist(),
+                "study_modes": ["Full-time"],
+            }
+        if rng.random() < 0.33:
+            profile["location"]["regions"] = rng.choice(regions, size=rng.integers(1, 3), replace=False).tolist()
+        profiles.append(profile)
+    return profiles
+
+
+def generate_paragraphs(count, seed=0):
+    """Synthetic free-text queries for the paragraph page."""
+    rng = np.random.default_rng(seed + 2)
+    return [
+        f"I enjoy {rng.choice(HOBBIES)} and I am interested in {rng.choice(SUBJECTS).lower()} "
+        f"and {rng.choice(SUBJECTS).lower()}. I would like to work as a {rng.choice(CAREERS)}."
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic course catalog CSV.")
+    parser.add_argument("rows", type=int, help="Number of course listings")
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rankings", default=None, help="Rankings CSV whose university names are reused")
+    args = parser.parse_args()
+    generate_catalog(args.rows, args.seed, args.rankings).to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QTextEdit, QPushButton, QScrollArea, QMessageBox
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
+from image_cache import ScaledBackground
 
 
 class CareerGoalsPage(QWidget):
@@ -16,7 +17,7 @@ class CareerGoalsPage(QWidget):
 
         # Background image label
         self.background_label = QLabel(self)
-        self.background_pixmap = QPixmap("7.png")  # Replace with your background image file
+        self.background = ScaledBackground(self.background_label, "7.png")  # Replace with your background image file
         self.background_label.setScaledContents(True)
 
         # Add background to main layout
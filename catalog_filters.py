@@ -0,0 +1,162 @@
+"""
+Precomputed filter indexes over the immutable course catalog.
+
+Categorical columns (Duration, Qualification, Study Mode) are encoded once as
+integer codes, and each value gets a packed bitmap of the rows holding it.
+A query's filters are combined with vectorized OR/AND over those bitmaps and
+the numeric tariff array, producing a row mask that is applied to the
+already-encoded TF-IDF matrix; the catalog itself is never modified.
+
+Tariff eligibility uses the lower and upper tariff bounds kept as sorted
+arrays with a permutation index, so "how many courses can these grades reach"
+is a binary search and the eligible rows are a prefix of the permutation.
+
+Location filtering uses the canonical university ids (see universities.py):
+region membership is a boolean (regions x universities) array, so a region
+selection becomes a single gather over the per-row university ids.
+"""
+import numpy as np
+from regions import UNIVERSITY_REGIONS, canonical_region
+
+FILTER_COLUMNS = ["Duration", "Qualification", "Study Mode"]
+
+
+def encode_column(values):
+    """Encode a column as (codes, distinct values); missing entries get code -1."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    return codes.astype(np.int32), [str(value) for value in uniques]
+
+
+class CategoryIndex:
+    def __init__(self, codes, values):
+        self.codes = codes
+        self.values = list(values)
+        self.positions = {value: code for code, value in enumerate(self.values)}
+        self.bitmaps = {}  # Packed row bitmap per code, built on first use
+
+    def bitmap(self, code):
+        """Packed bitmap of the rows holding the value with this code."""
+        if code not in self.bitmaps:
+            self.bitmaps[code] = np.packbits(self.codes == code)
+        return self.bitmaps[code]
+
+    def match(self, selected):
+        """Packed bitmap of the rows holding any of the selected values."""
+        combined = np.zeros((self.codes.size + 7) // 8, dtype=np.uint8)
+        for value in selected:
+            code = self.positions.get(value)
+            if code is not None:
+                combined |= self.bitmap(code)
+        return combined
+
+
+class TariffIndex:
+    def __init__(self, lower, upper=None, lower_order=None):
+        """
+        Args:
+            lower (ndarray): Tariff lower bound per row (NaN when unknown).
+            upper (ndarray): Optional tariff upper bound per row (NaN when unknown), for comfortable_count.
+            lower_order (ndarray): Precomputed stable argsort of the filled lower bounds.
+        """
+        # Courses without a listed tariff are open to everyone
+        lower = np.nan_to_num(lower, nan=0.0)
+        self.lower_order = np.argsort(lower, kind="stable") if lower_order is None else lower_order
+        self.sorted_lower = lower[self.lower_order]
+        self.sorted_upper = None if upper is None else np.sort(np.nan_to_num(upper, nan=0.0))
+
+    def eligible_count(self, ucas_points):
+        """Number of courses whose tariff lower bound is within reach of the points."""
+        return int(np.searchsorted(self.sorted_lower, ucas_points, side="right"))
+
+    def comfortable_count(self, ucas_points):
+        """Number of courses whose whole tariff range is within reach of the points."""
+        return int(np.searchsorted(self.sorted_upper, ucas_points, side="right"))
+
+    def eligible_mask(self, ucas_points):
+        """Boolean row mask of the courses within reach of the points."""
+        mask = np.zeros(self.lower_order.size, dtype=bool)
+        mask[self.lower_order[:self.eligible_count(ucas_points)]] = True
+        return mask
+
+
+class RegionIndex:
+    def __init__(self, university_ids, universities, university_regions=UNIVERSITY_REGIONS):
+        """
+        Args:
+            university_ids (ndarray): Canonical university id per row (-1 when missing).
+            universities (UniversityTable): Table the ids refer to.
+            university_regions (dict): Region -> university names.
+        """
+        self.university_ids = university_ids
+        self.universities = universities
+        self.region_names = list(university_regions)
+        self.region_positions = {region: position for position, region in enumerate(self.region_names)}
+
+        # One extra column so rows with a missing university (id -1) always map to False
+        self.membership = np.zeros((len(self.region_names), len(universities) + 1), dtype=bool)
+        for position, names in enumerate(university_regions.values()):
+            self.membership[position, universities.lookup_many(names)] = True
+
+    def mask(self, regions=(), universities=()):
+        """Boolean row mask for a location selection, or None when it doesn't restrict anything."""
+        regions = {canonical_region(region) for region in regions}
+        if regions:
+            if regions >= set(self.region_positions):
+                return None  # The entire UK is selected
+            selected = [self.region_positions[region] for region in regions if region in self.region_positions]
+            allowed = self.membership[selected].any(axis=0)
+        elif universities:
+            allowed = np.zeros(len(self.universities) + 1, dtype=bool)
+            allowed[self.universities.lookup_many(universities)] = True
+        else:
+            return None
+        return allowed[self.university_ids]
+
+
+class FilterIndex:
+    def __init__(self, categories, tariff, regions=None):
+        """
+        Args:
+            categories (dict): Column name -> CategoryIndex.
+            tariff (TariffIndex): Sorted tariff bounds.
+            regions (RegionIndex): Location index; None disables location filtering.
+        """
+        self.categories = categories
+        self.tariff = tariff
+        self.regions = regions
+        self.row_count = tariff.lower_order.size
+
+    @classmethod
+    def from_catalog(cls, catalog, tariff, regions=None):
+        """Encode the filter columns of a catalog DataFrame."""
+        categories = {
+            column: CategoryIndex(*encode_column(catalog[column]))
+            for column in FILTER_COLUMNS
+        }
+        return cls(categories, tariff, regions)
+
+    def mask(self, ucas_points=None, selections=None, location=None):
+        """
+        Boolean row mask for a query's filters.
+
+        Args:
+            ucas_points (float): Keep courses whose tariff lower bound is at most this.
+            selections (dict): Column name -> accepted values; empty selections don't filter.
+            location (dict): LocationPage selection with "regions" and/or "universities".
+        """
+        bitmap = np.full((self.row_count + 7) // 8, 0xFF, dtype=np.uint8)
+        for column, selected in (selections or {}).items():
+            if selected:
+                bitmap &= self.categories[column].match(selected)
+
+        mask = np.unpackbits(bitmap, count=self.row_count).astype(bool)
+        if ucas_points is not None:
+            mask &= self.tariff.eligible_mask(ucas_points)
+
+        if location and self.regions is not None:
+            region_mask = self.regions.mask(location.get("regions", []), location.get("universities", []))
+            if region_mask is not None:
+                mask &= region_mask
+        return mask
@@ -0,0 +1,42 @@
+"""
+Background loading of the shared recommendation engine for the GUI.
+
+The app starts loading (or building) the course index as soon as the start
+screen is up. Users spend minutes on the questionnaire, so the engine is
+usually ready before the first results are requested. The work runs on a
+daemon thread, which never blocks the app from closing mid-build.
+Completion is reported back to the GUI thread through a Qt signal.
+"""
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from recommendation_engine import get_engine, loaded_engine
+
+
+class EngineLoader(QObject):
+    # Emitted on the GUI thread once loading has finished, successfully or not
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread = None
+        self.error = None  # Exception raised by the load, if any
+
+    def start(self):
+        """Start loading the engine in the background (only the first call does anything)."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="engine-loader", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        try:
+            get_engine()
+        except Exception as error:  # Reported again by the page that needs the engine
+            self.error = error
+        finally:
+            self.finished.emit()
+
+    def is_ready(self):
+        """Whether asking for the engine now would return without waiting for a load."""
+        return loaded_engine() is not None or (self.thread is not None and not self.thread.is_alive())
@@ -0,0 +1,35 @@
+"""
+gunicorn settings for the recommendation API (gunicorn picks this file up from the working directory).
+
+    gunicorn -c gunicorn.conf.py app:app
+
+With preload_app the master imports app.py and loads the index before forking
+workers, so they share the DataFrame, vectorizer and memory-mapped arrays
+copy-on-write. A worker that starts without an engine (preloading disabled,
+or the master's load failed) loads it on a background thread and reports
+not ready until it is done.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("COURSE_RECOMMENDER_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("COURSE_RECOMMENDER_WORKERS", multiprocessing.cpu_count()))
+# Threaded workers, so concurrent requests can be micro-batched (see request_batcher.py)
+worker_class = "gthread"
+threads = int(os.environ.get("COURSE_RECOMMENDER_THREADS", 16))
+preload_app = True
+timeout = 120
+# Room for a result cursor in GET /recommendation/page (see MAX_TOKEN_CHARS in result_cursors.py)
+limit_request_line = 8190
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any worker is forked
+    if server.cfg.preload_app:
+        from app import load_engine
+        load_engine()
+
+
+def post_worker_init(worker):
+    from app import start_engine_load
+    start_engine_load()  # No-op when the engine came loaded from the master
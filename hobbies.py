@@ -3,7 +3,8 @@ from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QTextEdit, QPushButton, QScrollArea, QMessageBox
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
+from image_cache import ScaledBackground
 
 
 class HobbiesPage(QWidget):
@@ -17,7 +18,7 @@ class HobbiesPage(QWidget):
 
         # Background image label
         self.background_label = QLabel(self)
-        self.background_pixmap = QPixmap("back22.png")  # Replace with your background image file
+        self.background = ScaledBackground(self.background_label, "back22.png")  # Replace with your background image file
         self.background_label.setScaledContents(True)
 
         # Add background to main layout
@@ -80,11 +81,8 @@ class HobbiesPage(QWidget):
 
     def resize_background_image(self):
         """Resize the background image to cover the entire window."""
-        if not self.background_pixmap.isNull():
-            self.background_label.setPixmap(
-                self.background_pixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            )
-            self.background_label.setGeometry(0, 0, self.width(), self.height())
+        self.background.fit(self.size())
+        self.background_label.setGeometry(0, 0, self.width(), self.height())
 
     def update_overlay_position_and_size(self):
         """Keep the white box centered and maintain its size."""
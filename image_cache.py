@@ -0,0 +1,135 @@
+"""
+Process-wide cache for the app's background and map images.
+
+Each image file is decoded once and shared by every page. Smoothly scaled
+variants are kept per target size in a small LRU cache, so moving between
+pages, or back to a window size seen before, costs nothing.
+
+ScaledBackground keeps a label filled with a scaled image. While the window
+is being dragged it shows a cheap fast-scaled preview. The smooth rescale
+runs only once resizing has paused, and no query is running. Qt's smooth
+scaling waits on the GUI thread for pieces of work run on its global thread
+pool, without releasing the GIL, so it would stall behind a running query.
+Until the query finishes, the fast preview stays up.
+
+A label with scaled contents stretches whatever it is given to its own size,
+and it rescales smoothly on every paint after a resize. Such a label gets
+the image already stretched to its size, which looks the same and leaves
+QLabel nothing to rescale.
+"""
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QSize, Qt, QTimer
+from PyQt5.QtGui import QPixmap
+
+from query_runner import queries_running
+
+SCALED_CACHE_SIZE = 24  # Scaled variants kept across all images
+RESIZE_DEBOUNCE_MS = 120  # Quiet period after the last resize before the smooth rescale
+
+
+class ImageCache:
+    def __init__(self, max_scaled=SCALED_CACHE_SIZE):
+        self.max_scaled = max_scaled
+        self.originals = {}  # Path -> decoded QPixmap (null if the file is missing)
+        self.scaled = OrderedDict()  # (path, width, height, aspect mode) -> smooth-scaled QPixmap
+
+    def pixmap(self, path):
+        """The decoded image, loaded from disk on first use."""
+        if path not in self.originals:
+            self.originals[path] = QPixmap(path)
+        return self.originals[path]
+
+    def cached_scaled(self, path, size, mode=Qt.KeepAspectRatioByExpanding):
+        """A previously scaled variant for this size, or None."""
+        key = (path, size.width(), size.height(), mode)
+        pixmap = self.scaled.get(key)
+        if pixmap is not None:
+            self.scaled.move_to_end(key)
+        return pixmap
+
+    def scaled_pixmap(self, path, size, mode=Qt.KeepAspectRatioByExpanding):
+        """The image smoothly scaled to a size, cached with LRU eviction."""
+        pixmap = self.cached_scaled(path, size, mode)
+        if pixmap is not None:
+            return pixmap
+
+        original = self.pixmap(path)
+        if original.isNull():
+            return original
+        pixmap = original.scaled(size, mode, Qt.SmoothTransformation)
+        self.scaled[(path, size.width(), size.height(), mode)] = pixmap
+        if len(self.scaled) > self.max_scaled:
+            self.scaled.popitem(last=False)
+        return pixmap
+
+    def preview_pixmap(self, path, size, mode=Qt.KeepAspectRatioByExpanding):
+        """A fast, lower-quality scaled variant for use during live resizing (not cached)."""
+        return self.pixmap(path).scaled(size, mode, Qt.FastTransformation)
+
+
+_image_cache = None
+
+
+def image_cache():
+    """The shared image cache (created on first use, once a QApplication exists)."""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache()
+    return _image_cache
+
+
+class ScaledBackground(QObject):
+    """Keeps a label showing an image scaled to a target size, rescaling smoothly once resizing pauses."""
+
+    def __init__(self, label, path, mode=Qt.KeepAspectRatioByExpanding):
+        super().__init__(label)
+        self.label = label
+        self.path = path
+        self.mode = mode
+        self.size = None
+        self.shown = False  # The first fit is scaled smoothly straight away
+
+        self.rescale_timer = QTimer(self)
+        self.rescale_timer.setSingleShot(True)
+        self.rescale_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self.rescale_timer.timeout.connect(self.rescale)
+
+    def set_path(self, path):
+        """Switch to another image, refitting it to the current size."""
+        if path != self.path:
+            self.path = path
+            self.shown = False
+            if self.size is not None:
+                self.fit(self.size)
+
+    def scale_mode(self):
+        return Qt.IgnoreAspectRatio if self.label.hasScaledContents() else self.mode
+
+    def fit(self, size):
+        """Scale the image to a new size (call from resizeEvent)."""
+        self.size = QSize(size)
+        mode = self.scale_mode()
+        cache = image_cache()
+        if self.path is None or cache.pixmap(self.path).isNull():
+            return
+
+        pixmap = cache.cached_scaled(self.path, self.size, mode)
+        if pixmap is not None or not self.shown:
+            self.rescale_timer.stop()
+            self.rescale()
+            return
+
+        # Live resize: show a cheap preview now and the smooth version once resizing pauses
+        self.label.setPixmap(cache.preview_pixmap(self.path, self.size, mode))
+        self.rescale_timer.start()
+
+    def rescale(self):
+        cache, mode = image_cache(), self.scale_mode()
+        if cache.cached_scaled(self.path, self.size, mode) is None and queries_running():
+            # Smooth scaling would contend with the query; show the preview and retry later
+            self.label.setPixmap(cache.preview_pixmap(self.path, self.size, mode))
+            self.rescale_timer.start()
+        else:
+            self.label.setPixmap(cache.scaled_pixmap(self.path, self.size, mode))
+        self.shown = True
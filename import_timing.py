@@ -0,0 +1,109 @@
+"""
+Import-time breakdown for tracking start-up regressions.
+
+Set COURSE_RECOMMENDER_IMPORT_REPORT=1 to enable it. While enabled, every
+module import is timed, and report() prints the time spent per top-level
+package since the previous report. Nested imports are charged to their own
+package rather than to the importer.
+
+main.py prints one report once the window is shown. It prints another at
+exit, which covers the imports deferred until the engine was first used.
+Disabled by default, so normal runs pay nothing.
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+from importlib.abc import MetaPathFinder
+
+REPORT_ENV = "COURSE_RECOMMENDER_IMPORT_REPORT"
+
+
+def enabled():
+    """Whether the import-time report was requested through the environment."""
+    return os.environ.get(REPORT_ENV, "") not in ("", "0")
+
+
+class TimedLoader:
+    """Wraps a module loader so executing the module is timed."""
+
+    def __init__(self, loader, recorder, name):
+        self.loader = loader
+        self.recorder = recorder
+        self.name = name
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.recorder.start(self.name)
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.recorder.stop()
+
+    def __getattr__(self, attribute):
+        return getattr(self.loader, attribute)
+
+
+class ImportRecorder(MetaPathFinder):
+    """Meta-path hook recording the self time of every module import."""
+
+    def __init__(self):
+        self.stack = []  # [module name, start time, time spent in nested imports]
+        self.self_times = defaultdict(float)  # Top-level package -> seconds since the last report
+        self.module_counts = defaultdict(int)
+
+    def find_spec(self, name, path=None, target=None):
+        # Ask the remaining finders, then wrap whatever loader they return
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = TimedLoader(spec.loader, self, name)
+                return spec
+        return None
+
+    def start(self, name):
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self):
+        name, started, nested = self.stack.pop()
+        elapsed = time.perf_counter() - started
+        package = name.partition(".")[0]
+        self.self_times[package] += elapsed - nested
+        self.module_counts[package] += 1
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def report(self, phase, limit=15, stream=None):
+        """Print the per-package import time since the last report, slowest first."""
+        stream = stream or sys.stderr
+        total = sum(self.self_times.values())
+        print(f"Import time ({phase}): {total * 1000:.0f} ms in "
+              f"{sum(self.module_counts.values())} modules", file=stream)
+        ranked = sorted(self.self_times.items(), key=lambda item: item[1], reverse=True)
+        for package, seconds in ranked[:limit]:
+            print(f"  {seconds * 1000:8.1f} ms  {package} ({self.module_counts[package]} modules)", file=stream)
+        self.self_times.clear()
+        self.module_counts.clear()
+
+
+_recorder = None
+
+
+def install():
+    """Start recording imports; returns the recorder (installed once per process)."""
+    global _recorder
+    if _recorder is None:
+        _recorder = ImportRecorder()
+        sys.meta_path.insert(0, _recorder)
+    return _recorder
+
+
+def report(phase):
+    """Print the breakdown for a start-up phase if recording is active."""
+    if _recorder is not None:
+        _recorder.report(phase)
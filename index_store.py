@@ -0,0 +1,148 @@
+"""
+On-disk storage for the prebuilt course index.
+
+An index artifact is a directory holding the cleaned catalog, the TF-IDF
+vocabulary, and a set of flat binary arrays: the CSR matrix
+(data/indices/indptr), the IDF weights and the numeric catalog columns.
+The arrays are opened with numpy.memmap, so every process that loads the
+same artifact (e.g. gunicorn workers) shares one page-cache copy instead
+of holding a private one.
+
+pandas and scipy are imported when an artifact is read or written, not at
+module import, so the GUI can start without them.
+
+The artifact is keyed by a content hash of the catalog and rankings CSVs so
+a stale artifact is never used after either file changes.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+INDEX_DIR = "course_index"
+INDEX_FORMAT_VERSION = 10
+
+MANIFEST_FILE = "manifest.json"
+CATALOG_FILE = "catalog.pkl"
+VOCABULARY_FILE = "vocabulary.json"
+
+MATRIX_ARRAYS = ("tfidf_data", "tfidf_indices", "tfidf_indptr")
+
+
+def content_hash(*paths):
+    """Hash the contents of the given files (missing files hash as a marker)."""
+    digest = hashlib.sha256(f"course-index-v{INDEX_FORMAT_VERSION}".encode())
+    for path in paths:
+        try:
+            with open(path, "rb") as source:
+                for chunk in iter(lambda: source.read(1 << 20), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def read_manifest(directory=INDEX_DIR):
+    """Return the artifact manifest, or None if there is no readable artifact."""
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE)) as manifest_file:
+            return json.load(manifest_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def write_array(directory, name, array):
+    """Write an array as raw little-endian bytes and return its manifest entry."""
+    array = np.ascontiguousarray(array)
+    array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+    file_name = f"{name}.bin"
+    array.tofile(os.path.join(directory, file_name))
+    return {"file": file_name, "dtype": array.dtype.str, "shape": list(array.shape)}
+
+
+def open_array(directory, entry):
+    """Open a flat binary array read-only via numpy.memmap."""
+    shape = tuple(entry["shape"])
+    if 0 in shape:
+        return np.zeros(shape, dtype=entry["dtype"])  # mmap cannot map an empty file
+    return np.memmap(os.path.join(directory, entry["file"]), dtype=entry["dtype"], mode="r", shape=shape)
+
+
+def save_index(directory, key, catalog, vocabulary, matrix, arrays, metadata=None):
+    """
+    Write an index artifact; the manifest is written last so partial writes never validate.
+
+    Args:
+        directory (str): Artifact directory.
+        key (str): Content hash of the inputs the index was built from.
+        catalog (DataFrame): Cleaned catalog text columns.
+        vocabulary (dict): TF-IDF term to column mapping.
+        matrix (csr_matrix): Fitted TF-IDF matrix.
+        arrays (dict): Named numeric arrays (IDF weights, numeric catalog columns).
+        metadata (dict): Small JSON-serialisable extras stored in the manifest.
+    """
+    from scipy import sparse
+
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    catalog.to_pickle(os.path.join(directory, CATALOG_FILE))
+    with open(os.path.join(directory, VOCABULARY_FILE), "w") as vocabulary_file:
+        json.dump({term: int(column) for term, column in vocabulary.items()}, vocabulary_file)
+
+    matrix = sparse.csr_matrix(matrix)
+    matrix.sort_indices()
+    array_entries = {
+        "tfidf_data": write_array(directory, "tfidf_data", matrix.data),
+        "tfidf_indices": write_array(directory, "tfidf_indices", matrix.indices),
+        "tfidf_indptr": write_array(directory, "tfidf_indptr", matrix.indptr),
+    }
+    for name, array in arrays.items():
+        array_entries[name] = write_array(directory, name, array)
+
+    manifest = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "content_hash": key,
+        "rows": int(matrix.shape[0]),
+        "features": int(matrix.shape[1]),
+        "arrays": array_entries,
+        "metadata": metadata or {},
+    }
+    with open(manifest_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+def load_index(directory, key):
+    """Load an index artifact if it exists and was built from the same inputs, else None."""
+    manifest = read_manifest(directory)
+    if (
+        manifest is None
+        or manifest.get("format_version") != INDEX_FORMAT_VERSION
+        or manifest.get("content_hash") != key
+    ):
+        return None
+
+    import pandas as pd
+    from scipy import sparse
+
+    with open(os.path.join(directory, VOCABULARY_FILE)) as vocabulary_file:
+        vocabulary = json.load(vocabulary_file)
+
+    arrays = {name: open_array(directory, entry) for name, entry in manifest["arrays"].items()}
+    matrix = sparse.csr_matrix(
+        tuple(arrays.pop(name) for name in MATRIX_ARRAYS),
+        shape=(manifest["rows"], manifest["features"]),
+        copy=False,
+    )
+    return {
+        "catalog": pd.read_pickle(os.path.join(directory, CATALOG_FILE)),
+        "vocabulary": vocabulary,
+        "matrix": matrix,
+        "arrays": arrays,
+        "metadata": manifest.get("metadata", {}),
+    }
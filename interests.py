@@ -3,7 +3,8 @@ from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QScrollArea, QHBoxLayout
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QFont
+from PyQt5.QtGui import QFont
+from image_cache import ScaledBackground
 
 class InterestsPage(QWidget):
     def __init__(self, parent=None):
@@ -18,7 +19,7 @@ class InterestsPage(QWidget):
 
         # Background image label
         self.background_label = QLabel(self)
-        self.original_pixmap = QPixmap("1.png")  # Replace with your image file
+        self.background = ScaledBackground(self.background_label, "1.png")  # Replace with your image file
 
         # Light white box container
         self.overlay_container = QWidget(self)
@@ -85,12 +86,8 @@ class InterestsPage(QWidget):
         super().resizeEvent(event)
 
     def resize_background_image(self):
-        if not self.original_pixmap.isNull():
-            scaled_pixmap = self.original_pixmap.scaled(
-                self.width(), self.height(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
-            )
-            self.background_label.setPixmap(scaled_pixmap)
-            self.background_label.setFixedSize(self.size())
+        self.background.fit(self.size())
+        self.background_label.setFixedSize(self.size())
 
     def update_overlay_position_and_size(self):
         if self.overlay_container:
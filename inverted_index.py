@@ -0,0 +1,176 @@
+"""
+Inverted index over the fitted TF-IDF matrix.
+
+Each vocabulary term has a posting list of (course row, weight) pairs sorted
+by weight, highest first. A query only touches the posting lists of its own
+terms, so scoring cost follows the number of matching postings rather than
+the size of the catalog:
+
+- accumulate() scores every matching course term-at-a-time.
+- score_batch() scores many queries at once. The posting lists double as a
+  (terms x courses) CSR matrix, so a (queries x terms) query matrix times it
+  reads only the queries' posting lists.
+- top_k() does the same with MaxScore-style pruning: once k candidates are
+  known, a course that has not been seen yet can only enter the top k if its
+  contribution from the current term plus the best possible contribution of
+  the remaining terms reaches the current k-th score. Because posting lists
+  are weight-sorted, the lists are cut at that point and only their tails'
+  updates to existing candidates are applied.
+- match_count() counts the courses sharing a term with the query, without
+  scoring them, for the totals that top_k() can't give.
+"""
+import numpy as np
+from ranking import select_top_k
+
+# Relative slack on the pruning threshold so float rounding never drops a true winner
+PRUNING_TOLERANCE = 1e-9
+
+
+def aggregate(docs, contributions):
+    """Sum contributions per document, returning (sorted unique docs, summed scores)."""
+    if docs.size == 0:
+        return docs, contributions
+    order = np.argsort(docs, kind="stable")
+    docs = docs[order]
+    contributions = contributions[order]
+    starts = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+    return docs[starts], np.add.reduceat(contributions, starts)
+
+
+class InvertedIndex:
+    def __init__(self, term_ptr, docs, weights):
+        """
+        Args:
+            term_ptr (ndarray): Offsets of each term's posting list (length terms + 1).
+            docs (ndarray): Course row of every posting.
+            weights (ndarray): TF-IDF weight of every posting, descending within each term.
+        """
+        self.term_ptr = term_ptr
+        self.docs = docs
+        self.weights = weights
+
+        # Highest weight per term: the first posting of each non-empty list
+        lengths = np.diff(term_ptr)
+        self.term_max = np.zeros(lengths.size)
+        non_empty = lengths > 0
+        self.term_max[non_empty] = weights[term_ptr[:-1][non_empty]]
+        self.posting_matrix = None  # (terms x courses) CSR view of the postings, built on first use
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """Build weight-sorted posting lists from a (rows x terms) TF-IDF matrix."""
+        from scipy import sparse
+
+        columns = sparse.csc_matrix(matrix)
+        term_of_posting = np.repeat(np.arange(columns.shape[1]), np.diff(columns.indptr))
+        order = np.lexsort((columns.indices, -columns.data, term_of_posting))
+        return cls(
+            columns.indptr.astype(np.int64),
+            columns.indices[order].astype(np.int32),
+            columns.data[order],
+        )
+
+    def postings(self, term, allowed=None):
+        """Posting list of a term as (docs, weights), restricted to allowed rows if given."""
+        start, end = self.term_ptr[term], self.term_ptr[term + 1]
+        docs, weights = self.docs[start:end], self.weights[start:end]
+        if allowed is not None:
+            keep = allowed[docs]
+            docs, weights = docs[keep], weights[keep]
+        return docs, weights
+
+    def score_batch(self, query_vectors, row_count):
+        """
+        Scores of many queries with one sparse product over their terms' posting lists.
+
+        Args:
+            query_vectors: (queries x terms) sparse matrix.
+            row_count (int): Number of courses in the catalog.
+
+        Returns:
+            scipy.sparse.csr_matrix: (queries x courses) scores; row j holds the courses
+            matching query j, in no particular order (sorting every row costs more than
+            the product itself on large catalogs, and most callers don't need it).
+        """
+        from scipy import sparse
+
+        if self.posting_matrix is None or self.posting_matrix.shape[1] != row_count:
+            # Shares the posting arrays; the columns of a row are weight-ordered, not sorted
+            self.posting_matrix = sparse.csr_matrix(
+                (self.weights, self.docs, self.term_ptr), shape=(self.term_ptr.size - 1, row_count)
+            )
+        return sparse.csr_matrix(query_vectors) @ self.posting_matrix
+
+    def accumulate(self, query_vector, allowed=None):
+        """
+        Score every course sharing a term with the query.
+
+        Args:
+            query_vector: 1 x terms sparse query vector.
+            allowed (ndarray): Optional boolean row mask; other rows are ignored.
+
+        Returns:
+            tuple: (course rows in ascending order, their scores)
+        """
+        doc_parts, score_parts = [], []
+        for term, query_weight in zip(query_vector.indices, query_vector.data):
+            docs, weights = self.postings(term, allowed)
+            doc_parts.append(docs)
+            score_parts.append(query_weight * weights)
+
+        if not doc_parts:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        return aggregate(np.concatenate(doc_parts), np.concatenate(score_parts))
+
+    def match_count(self, query_vector, allowed):
+        """Number of allowed courses sharing at least one term with the query, without scoring them."""
+        matched = np.zeros(allowed.size, dtype=bool)
+        for term in query_vector.indices:
+            start, end = self.term_ptr[term], self.term_ptr[term + 1]
+            matched[self.docs[start:end]] = True
+        return int(np.count_nonzero(matched & allowed))
+
+    def top_k(self, query_vector, k, tie_break, allowed=None):
+        """
+        The k best-scoring courses for a query, with early termination.
+
+        Args:
+            query_vector: 1 x terms sparse query vector.
+            k (int): Number of results wanted.
+            tie_break (ndarray): Per-row key, lower wins among equal scores.
+            allowed (ndarray): Optional boolean row mask; other rows are ignored.
+
+        Returns:
+            tuple: (course rows, scores) in ranked order; only courses with a positive score.
+        """
+        terms, query_weights = query_vector.indices, query_vector.data
+        bounds = query_weights * self.term_max[terms]
+        order = np.argsort(-bounds, kind="stable")
+        terms, query_weights, bounds = terms[order], query_weights[order], bounds[order]
+        # Best score any course could still gain from the terms after each one
+        remaining = np.r_[np.cumsum(bounds[::-1])[::-1][1:], 0.0]
+
+        candidate_docs = np.empty(0, dtype=np.int32)
+        candidate_scores = np.empty(0)
+        threshold = None
+        for term, query_weight, rest in zip(terms, query_weights, remaining):
+            docs, weights = self.postings(term, allowed)
+            contributions = query_weight * weights
+
+            if threshold is not None:
+                # Weight-sorted list: new courses can only come from the head
+                cutoff = threshold * (1 - PRUNING_TOLERANCE) - rest
+                head = int(np.searchsorted(-contributions, -cutoff, side="right"))
+                tail_docs = docs[head:]
+                existing = np.isin(tail_docs, candidate_docs)
+                docs = np.concatenate([docs[:head], tail_docs[existing]])
+                contributions = np.concatenate([contributions[:head], contributions[head:][existing]])
+
+            candidate_docs, candidate_scores = aggregate(
+                np.concatenate([candidate_docs, docs]), np.concatenate([candidate_scores, contributions])
+            )
+            if candidate_docs.size >= k > 0:
+                threshold = np.partition(candidate_scores, candidate_docs.size - k)[candidate_docs.size - k]
+
+        ranked = select_top_k(candidate_scores, tie_break[candidate_docs], k)
+        return candidate_docs[ranked], candidate_scores[ranked]
@@ -1,7 +1,15 @@
+import logging
+import os
 import sys
-from PyQt5.QtWidgets import QApplication, QStackedWidget, QLabel
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap
+import import_timing
+
+if import_timing.enabled():
+    import_timing.install()  # Must run before the imports it measures
+
+from PyQt5.QtWidgets import QApplication, QStackedWidget, QLabel, QProgressDialog
+from PyQt5.QtCore import Qt, QTimer
+from image_cache import ScaledBackground
+from engine_loader import EngineLoader
 from interests import InterestsPage
 from predicted_grades import PredictedGradesPage
 from location import LocationPage
@@ -13,9 +21,56 @@ from start_page import StartPage
 from course_preferences_page import CoursePreferencesPage
 from paragraph_input_page import ParagraphPage as ParagraphInputPage
 from paragraph_results_page import ParagraphResultsPage  # Import the paragraph results page
+import metrics_overlay
+
+LOG_LEVEL_ENV = "COURSE_RECOMMENDER_LOG_LEVEL"  # e.g. DEBUG to follow queries and paging
+
+
+class LazyPage:
+    """Page attribute that constructs and adds its page to the stack on first access."""
+
+    def __init__(self, page_class):
+        self.page_class = page_class
+
+    def __set_name__(self, owner, name):
+        self.attribute = f"_{name}"
+
+    def __get__(self, app, owner=None):
+        if app is None:
+            return self
+        page = getattr(app, self.attribute, None)
+        if page is None:
+            page = self.page_class(app)
+            app.addWidget(page)
+            setattr(app, self.attribute, page)
+        return page
 
 
 class CourseRecommendationApp(QStackedWidget):
+    # Pages are only built when first navigated to
+    start_page = LazyPage(StartPage)
+    interests_page = LazyPage(InterestsPage)
+    grades_page = LazyPage(PredictedGradesPage)
+    preferences_page = LazyPage(CoursePreferencesPage)
+    location_page = LazyPage(LocationPage)
+    hobbies_page = LazyPage(HobbiesPage)
+    strengths_page = LazyPage(StrengthsPage)
+    career_goals_page = LazyPage(CareerGoalsPage)
+    results_page = LazyPage(ResultsPage)
+    paragraph_input_page = LazyPage(ParagraphInputPage)  # Paragraph input page
+    paragraph_results_page = LazyPage(ParagraphResultsPage)  # Paragraph results page
+
+    # Page shown after each step of the 7-stage questionnaire
+    next_pages = {
+        StartPage: "interests_page",
+        InterestsPage: "grades_page",
+        PredictedGradesPage: "preferences_page",
+        CoursePreferencesPage: "location_page",
+        LocationPage: "hobbies_page",
+        HobbiesPage: "strengths_page",
+        StrengthsPage: "career_goals_page",
+    }
+
     def __init__(self):
         super().__init__()
         self.data = {}  # Dictionary to store user input data
@@ -23,6 +78,7 @@ class CourseRecommendationApp(QStackedWidget):
         # Background image label
         self.background_label = QLabel(self)
         self.background_label.setScaledContents(True)
+        self.background = ScaledBackground(self.background_label, None)
 
         # Dictionary to map pages to their background images
         self.page_backgrounds = {
@@ -39,53 +95,42 @@ class CourseRecommendationApp(QStackedWidget):
             ParagraphResultsPage: "13.png",
         }
 
-        # Create all pages
-        self.start_page = StartPage(self)
-        self.interests_page = InterestsPage(self)
-        self.grades_page = PredictedGradesPage(self)
-        self.preferences_page = CoursePreferencesPage(self)
-        self.location_page = LocationPage(self)
-        self.hobbies_page = HobbiesPage(self)
-        self.strengths_page = StrengthsPage(self)
-        self.career_goals_page = CareerGoalsPage(self)
-        self.results_page = ResultsPage(self)
-        self.paragraph_input_page = ParagraphInputPage(self)  # Paragraph input page
-        self.paragraph_results_page = ParagraphResultsPage(self)  # Paragraph results page
-
-        # Add pages to the QStackedWidget
-        self.addWidget(self.start_page)
-        self.addWidget(self.interests_page)
-        self.addWidget(self.grades_page)
-        self.addWidget(self.preferences_page)
-        self.addWidget(self.location_page)
-        self.addWidget(self.hobbies_page)
-        self.addWidget(self.strengths_page)
-        self.addWidget(self.career_goals_page)
-        self.addWidget(self.results_page)
-        self.addWidget(self.paragraph_input_page)
-        self.addWidget(self.paragraph_results_page)
+        # Load the course index in the background while the user answers the questionnaire
+        self.engine_loader = EngineLoader(self)
+        self.engine_loader.finished.connect(self.on_engine_loaded)
+        self.pending_display = None  # Results display waiting for the engine
+        self.progress_dialog = None
+
+        # Queries still running for a results page are cancelled once the user leaves it
+        self.currentChanged.connect(self.cancel_hidden_queries)
+
+        # Optional developer overlay with the query stage timings
+        self.metrics_overlay = metrics_overlay.MetricsOverlay(self) if metrics_overlay.enabled() else None
+        if self.metrics_overlay is not None:
+            self.currentChanged.connect(lambda _: self.metrics_overlay.refresh())  # Stay above new pages
 
         # Set the initial page and background
         self.setCurrentWidget(self.start_page)
         self.update_background()
 
+        # Start once the event loop is running so the start screen appears first
+        QTimer.singleShot(0, self.engine_loader.start)
+
     def resizeEvent(self, event):
         """Handle resizing of the window and adjust the background image."""
         self.resize_background()
         super().resizeEvent(event)
+        if self.metrics_overlay is not None:
+            self.metrics_overlay.refresh()
 
     def resize_background(self):
         """Resize the current background image to fill the window."""
         current_page = type(self.currentWidget())
         background_path = self.page_backgrounds.get(current_page)
         if background_path:
-            pixmap = QPixmap(background_path)
-            if not pixmap.isNull():
-                scaled_pixmap = pixmap.scaled(
-                    self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
-                )
-                self.background_label.setPixmap(scaled_pixmap)
-                self.background_label.setGeometry(0, 0, self.width(), self.height())
+            self.background.set_path(background_path)
+            self.background.fit(self.size())
+            self.background_label.setGeometry(0, 0, self.width(), self.height())
 
     def update_background(self):
         """Update the background image when the page changes."""
@@ -101,38 +146,67 @@ class CourseRecommendationApp(QStackedWidget):
             self.data[section_name] = section_data
 
         # Determine which page to show next
-        if self.currentWidget() == self.start_page:
-            self.setCurrentWidget(self.interests_page)
-        elif self.currentWidget() == self.interests_page:
-            self.setCurrentWidget(self.grades_page)
-        elif self.currentWidget() == self.grades_page:
-            self.setCurrentWidget(self.preferences_page)
-        elif self.currentWidget() == self.preferences_page:
-            self.setCurrentWidget(self.location_page)
-        elif self.currentWidget() == self.location_page:
-            self.setCurrentWidget(self.hobbies_page)
-        elif self.currentWidget() == self.hobbies_page:
-            self.setCurrentWidget(self.strengths_page)
-        elif self.currentWidget() == self.strengths_page:
-            self.setCurrentWidget(self.career_goals_page)
-        elif self.currentWidget() == self.career_goals_page:
+        current_page = type(self.currentWidget())
+        if current_page in self.next_pages:
+            self.setCurrentWidget(getattr(self, self.next_pages[current_page]))
+        elif current_page is CareerGoalsPage:
             # Display the standard recommendation results
             self.display_results()
-        elif self.currentWidget() == self.paragraph_input_page:
+        elif current_page is ParagraphInputPage:
             # Display the paragraph-based results
             self.display_paragraph_results()
 
         # Update the background image for the new page
         self.update_background()
 
+    def cancel_hidden_queries(self):
+        """Cancel in-flight queries of results pages that are no longer shown."""
+        for page in (self.widget(index) for index in range(self.count())):
+            if page is not self.currentWidget() and hasattr(page, "query_runner"):
+                page.query_runner.cancel()
+
+    def wait_for_engine(self, display):
+        """
+        Run a results display once the engine has loaded, showing progress meanwhile.
+
+        Returns:
+            bool: True if the engine is ready and the display can run now.
+        """
+        if self.engine_loader.is_ready():
+            return True
+
+        self.pending_display = display
+        if self.progress_dialog is None:
+            self.progress_dialog = QProgressDialog("Preparing the course catalogue...", None, 0, 0, self)
+            self.progress_dialog.setWindowTitle("Please Wait")
+            self.progress_dialog.setWindowModality(Qt.WindowModal)
+            self.progress_dialog.setMinimumDuration(0)
+        self.progress_dialog.show()
+        return False
+
+    def on_engine_loaded(self):
+        """Finish any results display that was waiting for the engine."""
+        if self.progress_dialog is not None:
+            self.progress_dialog.close()
+        if isinstance(self.currentWidget(), PredictedGradesPage):
+            self.currentWidget().update_eligible_count()  # The eligibility count needs the catalog
+
+        display, self.pending_display = self.pending_display, None
+        if display is not None:
+            display()
+
     def display_results(self):
         """Pass the collected user inputs to the ResultsPage for recommendations."""
+        if not self.wait_for_engine(self.display_results):
+            return
         self.results_page.display_recommendations(self.data)
         self.setCurrentWidget(self.results_page)
         self.update_background()
 
     def display_paragraph_results(self):
         """Navigate to the results page for paragraph input."""
+        if not self.wait_for_engine(self.display_paragraph_results):
+            return
         paragraph_text = self.data.get("paragraph", "")
         self.paragraph_results_page.display_results(paragraph_text)
         self.setCurrentWidget(self.paragraph_results_page)
@@ -140,9 +214,16 @@ class CourseRecommendationApp(QStackedWidget):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=os.environ.get(LOG_LEVEL_ENV, "WARNING").upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
     app = QApplication(sys.argv)
     window = CourseRecommendationApp()
     window.setWindowTitle("University Course Recommendation")
     window.setGeometry(100, 100, 800, 600)  # Set a default window size
     window.show()
-    sys.exit(app.exec_())
+    import_timing.report("start-up")
+    exit_code = app.exec_()
+    import_timing.report("deferred until first use")
+    sys.exit(exit_code)
@@ -0,0 +1,55 @@
+"""
+Developer overlay showing the query stage timings (see stage_metrics.py).
+
+Set COURSE_RECOMMENDER_DEV_OVERLAY=1 to enable it. A small translucent
+panel in the top-right corner of the window then shows the count, mean,
+p95 and maximum time of every stage. It refreshes once a second. Ctrl+Shift+M
+hides and shows it.
+"""
+import os
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont, QKeySequence
+from PyQt5.QtWidgets import QLabel, QShortcut
+
+from stage_metrics import metrics
+
+OVERLAY_ENV = "COURSE_RECOMMENDER_DEV_OVERLAY"
+REFRESH_MS = 1000
+MARGIN = 10
+
+
+def enabled():
+    """Whether the overlay was requested through the environment."""
+    return os.environ.get(OVERLAY_ENV, "") not in ("", "0")
+
+
+class MetricsOverlay(QLabel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setFont(QFont("Courier", 9))
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: #e0f0f0; padding: 6px; border-radius: 4px;")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)  # Never steals clicks from the page below
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+        self.shortcut = QShortcut(QKeySequence("Ctrl+Shift+M"), parent)
+        self.shortcut.activated.connect(self.toggle)
+        self.refresh()
+
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+
+    def refresh(self):
+        """Redraw the stage table and keep the panel in the parent's top-right corner, above the pages."""
+        if not self.isVisible():
+            return
+        lines = [f"{'stage':<10} {'n':>6} {'mean':>8} {'p95':>8} {'max':>8}"]
+        for stage, summary in metrics.snapshot().items():
+            lines.append(f"{stage:<10} {summary['count']:>6} {summary['mean_ms']:>6.1f}ms "
+                         f"{summary['p95_ms']:>6.1f}ms {summary['max_ms']:>6.1f}ms")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(self.parent().width() - self.width() - MARGIN, MARGIN)
+        self.raise_()
@@ -2,7 +2,8 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QTextEdit, QPushButton, QScrollArea, QMessageBox
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtGui import QFont
+from image_cache import ScaledBackground
 
 
 class ParagraphPage(QWidget):
@@ -16,7 +17,7 @@ class ParagraphPage(QWidget):
 
         # Background image label
         self.background_label = QLabel(self)
-        self.background_pixmap = QPixmap("12.png")  # Replace with your background image file
+        self.background = ScaledBackground(self.background_label, "12.png")  # Replace with your background image file
         self.background_label.setScaledContents(True)
 
         # Add background to the main layout
@@ -66,11 +67,8 @@ class ParagraphPage(QWidget):
 
     def resize_background_image(self):
         """Resize the background image to cover the entire window."""
-        if not self.background_pixmap.isNull():
-            self.background_label.setPixmap(
-                self.background_pixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            )
-            self.background_label.setGeometry(0, 0, self.width(), self.height())
+        self.background.fit(self.size())
+        self.background_label.setGeometry(0, 0, self.width(), self.height())
 
     def update_overlay_position_and_size(self):
         """Keep the white box centered and maintain its size."""
@@ -97,5 +95,4 @@ class ParagraphPage(QWidget):
         else:
             # Pass the paragraph text to the parent for processing
             self.parent().data["paragraph"] = paragraph_text
-            self.parent().paragraph_results_page.display_results(paragraph_text)
-            self.parent().setCurrentWidget(self.parent().paragraph_results_page)
+            self.parent().display_paragraph_results()
@@ -2,7 +2,8 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QHBoxLayout, QComboBox, QSlider, QPushButton, QScrollArea
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QFont
+from image_cache import ScaledBackground
+from recommendation_engine import calculate_ucas_points, loaded_engine
 
 
 class PredictedGradesPage(QWidget):
@@ -17,7 +18,7 @@ class PredictedGradesPage(QWidget):
 
         # Background image label
         self.background_label = QLabel(self)
-        self.original_pixmap = QPixmap("2.png")  # Replace with your image file
+        self.background = ScaledBackground(self.background_label, "2.png")  # Replace with your image file
 
         # Light white box container
         self.overlay_container = QWidget(self)
@@ -44,8 +45,14 @@ class PredictedGradesPage(QWidget):
         self.grade_inputs.setSpacing(30)  # Adjust spacing between grade input sections
         content_layout.addLayout(self.grade_inputs)
 
+        # Live count of courses within reach of the current grades
+        self.eligible_label = QLabel("")
+        self.eligible_label.setStyleSheet("color: #40797d; font-weight: bold;")
+        self.eligible_label.setAlignment(Qt.AlignCenter)
+
         # Add initial grade input
         self.add_grade_input()
+        content_layout.addWidget(self.eligible_label, alignment=Qt.AlignCenter)
 
         # Add button
         self.add_button = QPushButton("Add Another Subject")
@@ -81,12 +88,8 @@ class PredictedGradesPage(QWidget):
 
     def resize_background_image(self):
         """Resize the background image to fit the window while maintaining aspect ratio."""
-        if not self.original_pixmap.isNull():
-            scaled_pixmap = self.original_pixmap.scaled(
-                self.width(), self.height(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
-            )
-            self.background_label.setPixmap(scaled_pixmap)
-            self.background_label.setFixedSize(self.size())
+        self.background.fit(self.size())
+        self.background_label.setFixedSize(self.size())
 
     def update_overlay_position_and_size(self):
         """Update the position and size of the overlay box dynamically."""
@@ -200,10 +203,14 @@ class PredictedGradesPage(QWidget):
             "confidence_slider": confidence_slider
         })
 
+        # Refresh the eligible course count whenever a slider moves
+        grade_slider.valueChanged.connect(self.update_eligible_count)
+        confidence_slider.valueChanged.connect(self.update_eligible_count)
+        self.update_eligible_count()
 
-    def next_page(self):
+    def collect_grades(self):
         """
-        Collects all input data and sends it to the parent widget before moving to the next page.
+        Read the subject, grade and confidence-adjusted factor from every grade input.
         """
         # Confidence adjustment factors
         confidence_adjustment = {
@@ -228,6 +235,30 @@ class PredictedGradesPage(QWidget):
                 "grade": grade,
                 "confidence": adjusted_confidence  # Adjusted confidence factor
             })
+        return grades_data
+
+    def update_eligible_count(self):
+        """
+        Show how many distinct courses the current grades can reach (binary searches
+        over the per-course tariff bounds, so cheap enough for every slider tick).
+        """
+        engine = loaded_engine()
+        if engine is None:
+            self.eligible_label.setText("")  # Catalog not loaded yet
+            return
+
+        ucas_points = calculate_ucas_points(self.collect_grades())
+        eligible, comfortable = engine.count_eligible(ucas_points)
+        self.eligible_label.setText(
+            f"{ucas_points:.0f} UCAS points: {eligible} courses within reach ({comfortable} comfortably)"
+        )
+
+
+    def next_page(self):
+        """
+        Collects all input data and sends it to the parent widget before moving to the next page.
+        """
+        grades_data = self.collect_grades()
 
         # Pass the grades data to the parent widget
         self.parent().move_to_next_section("grades", grades_data)
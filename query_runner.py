@@ -0,0 +1,95 @@
+"""
+Runs recommendation queries off the GUI thread.
+
+A results page submits its query to a QueryRunner. The query runs on the
+runner's own single-thread QThreadPool, and the result (or the exception it raised) comes back to the
+GUI thread through a signal. Each runner has at most one live query.
+Submitting a new query, or calling cancel(), drops the current one:
+- if it has not started yet, it is taken off the pool queue;
+- if it is already running, its result is discarded when it finishes.
+
+The runner never uses QThreadPool.globalInstance(). Qt's smooth image
+scaling splits its work across the global pool and waits for the pieces on
+the GUI thread while holding the GIL. A query occupying a global pool
+thread would stall that wait, and deadlocks it outright when the pool has
+one thread (single-CPU machines).
+"""
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+_running = 0  # Query tasks currently executing on any runner's pool
+_running_lock = threading.Lock()
+
+
+def queries_running():
+    """Whether any query is executing on a worker thread right now (cancelled ones included)."""
+    return _running > 0
+
+
+class QuerySignals(QObject):
+    # (task, result, error) emitted from the worker thread when a query ends
+    done = pyqtSignal(object, object, object)
+
+
+class QueryTask(QRunnable):
+    def __init__(self, function, args):
+        super().__init__()
+        self.setAutoDelete(False)  # The runner keeps the task alive until it reports back
+        self.function = function
+        self.args = args
+        self.cancelled = False
+        self.signals = QuerySignals()
+
+    def run(self):
+        global _running
+        if self.cancelled:
+            return
+        result, error = None, None
+        with _running_lock:
+            _running += 1
+        try:
+            result = self.function(*self.args)
+        except Exception as exception:
+            error = exception
+        finally:
+            with _running_lock:
+                _running -= 1
+        self.signals.done.emit(self, result, error)
+
+
+class QueryRunner(QObject):
+    finished = pyqtSignal(object)  # Result of the latest query
+    failed = pyqtSignal(object)  # Exception raised by the latest query
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        if pool is None:
+            pool = QThreadPool(self)
+            pool.setMaxThreadCount(1)  # One live query per runner
+        self.pool = pool
+        self.current = None
+
+    def submit(self, function, *args):
+        """Run function(*args) on the thread pool, cancelling the query already in flight."""
+        self.cancel()
+        task = QueryTask(function, args)
+        task.signals.done.connect(self.on_done)
+        self.current = task
+        self.pool.start(task)
+
+    def cancel(self):
+        """Drop the query in flight, if any; its result will never be delivered."""
+        if self.current is not None:
+            self.current.cancelled = True
+            self.pool.tryTake(self.current)
+            self.current = None
+
+    def on_done(self, task, result, error):
+        if task is not self.current or task.cancelled:
+            return  # Superseded or cancelled while running
+        self.current = None
+        if error is not None:
+            self.failed.emit(error)
+        else:
+            self.finished.emit(result)
@@ -0,0 +1,34 @@
+"""
+Partial top-k selection over score arrays.
+"""
+import numpy as np
+
+
+def select_top_k(scores, tie_break, k):
+    """
+    Positions of the k best entries, ordered by score (descending) then tie_break (ascending).
+
+    Uses argpartition-style selection so only the k winners (plus exact ties at the
+    cut-off) are ever sorted; remaining ties are broken by position for stable output.
+    """
+    n = scores.size
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        kth_score = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth_score)
+        tied = np.flatnonzero(scores == kth_score)
+        needed = k - above.size
+        if tied.size > needed:
+            tied_keys = tie_break[tied]
+            kth_key = np.partition(tied_keys, needed - 1)[needed - 1]
+            better = tied[tied_keys < kth_key]
+            equal = tied[tied_keys == kth_key][:needed - better.size]
+            tied = np.concatenate([better, equal])
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(n)
+
+    order = np.lexsort((candidates, tie_break[candidates], -scores[candidates]))
+    return candidates[order]
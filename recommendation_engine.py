@@ -0,0 +1,825 @@
+"""
+Headless course recommendation engine.
+
+The engine loads the course catalog and university rankings once, fits the
+TF-IDF model once, and then answers queries with a single sparse
+vector-matrix product. It has no Qt dependency so the GUI pages, the Flask
+API and batch tooling can all share the same instance.
+
+pandas, scikit-learn and NLTK are imported when the engine is first loaded,
+not when this module is imported, so the GUI can start without them.
+"""
+import json
+import threading
+
+import numpy as np
+from index_store import INDEX_DIR, content_hash, load_index, save_index
+from ranking import select_top_k
+from inverted_index import InvertedIndex
+from text_preprocessing import preprocess_many, preprocess_text
+from catalog_filters import FILTER_COLUMNS, CategoryIndex, FilterIndex, RegionIndex, TariffIndex
+from regions import UNIVERSITY_REGIONS, canonical_region
+from universities import UniversityTable, table_array
+from recommendation_model import RecommendationExplanationSystem
+from result_cache import CachedRanking, query_key
+from stage_metrics import metrics, stage_timer
+
+CATALOG_PATH = "combined_university_courses.csv"
+RANKINGS_PATH = "UK_University_Rankings_-_Full_Inclusive_List.csv"
+
+REQUIRED_COLUMNS = [
+    'Course Title', 'Qualification', 'University Name', 'Duration',
+    'Study Mode', 'UCAS Tariff Points', 'Course URL'
+]
+
+# Text columns kept in the catalog DataFrame; numeric columns live in flat arrays
+TEXT_COLUMNS = [
+    'Course Title', 'Qualification', 'University Name', 'Duration',
+    'Study Mode', 'Course URL', 'cleaned_description'
+]
+
+# Column order expected by the results tables
+RESULT_COLUMNS = [
+    'similarity_score', 'Course Title', 'University Name', 'Duration',
+    'Qualification', 'Study Mode', 'UCAS Tariff Points', 'Course URL', 'Explanation', 'Rank'
+]
+
+UNRANKED = 999  # Rank assigned to universities missing from the rankings file
+SORT_COMPATIBILITY = "compatibility"
+SORT_UNIVERSITY = "university"  # A page's courses ordered by university rank, unranked last
+SORT_ORDERS = [SORT_COMPATIBILITY, SORT_UNIVERSITY]
+
+MATCHED_TERMS = 'Matched Terms'  # Result column of [(term, contribution to the score)] per course
+MATCHED_TERMS_LIMIT = 3  # Terms quoted in each explanation
+CACHE_DEPTH = 100  # Top results stored per result-cache entry, so any page size up to this hits
+BATCH_MIN_CANDIDATE_SHARE = 0.25  # Profiles with fewer candidate rows than this share of the catalog skip the batch product
+BATCH_MAX_NONZEROS = 2_000_000  # Scores per batch product (about 24 MB); larger batches are split
+
+
+def extract_lower_bound(value):
+    """Parse a UCAS tariff entry such as "104-112" or "120" into its lower bound."""
+    try:
+        if '-' in value:  # Handle ranges like "104-112"
+            return float(value.split('-')[0])
+        return float(value)  # Handle single numeric values
+    except (ValueError, TypeError):
+        return None  # Return None for invalid entries
+
+
+def extract_upper_bound(value):
+    """Parse a UCAS tariff entry such as "104-112" or "120" into its upper bound."""
+    try:
+        if '-' in value:  # Handle ranges like "104-112"
+            return float(value.split('-')[-1])
+        return float(value)  # Handle single numeric values
+    except (ValueError, TypeError):
+        return None  # Return None for invalid entries
+
+
+def calculate_ucas_points(grades):
+    """Convert the grade/confidence entries from PredictedGradesPage into a UCAS points total."""
+    ucas_table = {1: 16, 2: 24, 3: 32, 4: 40, 5: 48, 6: 56}
+    total_points = 0
+
+    for grade_entry in grades:
+        grade = grade_entry["grade"]
+        confidence_factor = grade_entry["confidence"]
+        grade_points = ucas_table.get(grade, 0)
+        adjusted_points = grade_points * confidence_factor
+        total_points += adjusted_points
+
+    return total_points
+
+
+def combine_profile_text(profile):
+    """Combine the 7-stage questionnaire answers into a single query string."""
+    combined_input = " ".join(
+        [
+            str(profile.get('interests', '')).strip(),
+            str(profile.get('hobbies', '')).strip(),
+            str(profile.get('strengths', '')).strip(),
+            str(profile.get('career_goals', '')).strip()
+        ]
+    ).strip()
+
+    # Fallback if combined input is empty
+    if not combined_input:
+        combined_input = "general interests and goals"
+    return combined_input
+
+
+class RankedResults:
+    """
+    Scored candidates for a single query, ranked lazily.
+
+    Only the top-k rows are ever selected and turned into a DataFrame; asking for
+    more (e.g. "Load More Results") grows k instead of re-scoring the catalog.
+    When the query vector is known, each returned row also carries the query
+    terms it matched, and `explain(results, start)` (if given) writes the
+    Explanation column of results starting at ranked position `start`.
+    """
+
+    def __init__(self, engine, rows, scores, query_vector=None, explain=None):
+        self.engine = engine
+        self.rows = rows  # Catalog row positions that passed filtering and de-duplication
+        self.scores = scores
+        self.order = np.empty(0, dtype=np.intp)  # Ranked positions into rows, grown on demand
+        self.query_vector = query_vector
+        self.explain = explain
+
+    def __len__(self):
+        return int(self.rows.size)
+
+    def ranked_rows(self, k):
+        """Catalog row positions of the top k results, growing the ranked prefix if needed."""
+        k = min(k, len(self))
+        order = self.order  # Read once: another thread may grow the prefix meanwhile
+        if k > order.size:
+            # Grow at least geometrically, so paging through n results selects O(log n) times
+            grown = min(max(k, 2 * order.size), len(self))
+            with stage_timer("top_k"):
+                order = select_top_k(self.scores, self.engine.university_rank[self.rows], grown)
+            self.order = order
+        return self.rows[order[:k]], self.scores[order[:k]]
+
+    def nbytes(self):
+        """Memory held by the ranking, counting a fully grown ranked prefix."""
+        return self.rows.nbytes + self.scores.nbytes + self.rows.size * np.dtype(np.intp).itemsize
+
+    def top(self, k):
+        """DataFrame of the top k results in the results-table column order, plus Matched Terms."""
+        return self.materialize(*self.ranked_rows(k))
+
+    def page(self, start, count, sort=SORT_COMPATIBILITY):
+        """
+        Results start to start + count of the ranking; only that slice is materialised.
+
+        With SORT_UNIVERSITY the same courses (the next `count` most compatible) are
+        ordered by university rank instead, as "Sort by Best Universities" does.
+        """
+        rows, scores = self.ranked_rows(start + count)
+        results = self.materialize(rows[start:], scores[start:], start)
+        return order_by_university(results) if sort == SORT_UNIVERSITY else results
+
+    def materialize(self, rows, scores, start=0):
+        with stage_timer("join"):
+            results = self.engine.materialize(rows, scores)
+        with stage_timer("explain"):
+            if self.query_vector is not None:
+                results[MATCHED_TERMS] = self.engine.matched_terms(self.query_vector, rows)
+            if self.explain is not None:
+                results = self.explain(results, start)
+        return results[RESULT_COLUMNS + [MATCHED_TERMS]]
+
+
+def order_by_university(results):
+    """Results reordered by university rank (unranked last), keeping compatibility order among equals."""
+    return results.iloc[np.argsort(results["Rank"].to_numpy(), kind="stable")]
+
+
+def format_matched_terms(terms):
+    """Readable list of (term, contribution) pairs, e.g. "history (+0.21) and politics (+0.08)"."""
+    parts = [f"{term} (+{weight:.2f})" for term, weight in terms]
+    if len(parts) < 2:
+        return "".join(parts)
+    return ", ".join(parts[:-1]) + " and " + parts[-1]
+
+
+def add_paragraph_explanations(recommendations, start=0):
+    """Fill the Explanation column of paragraph-query results from their matched terms."""
+    explanations = []
+    for title, university, score, terms in zip(
+        recommendations['Course Title'], recommendations['University Name'],
+        recommendations['similarity_score'], recommendations[MATCHED_TERMS]
+    ):
+        explanation = f"The course {title} at {university} aligns with your interests with a similarity score of {score:.2f}."
+        if terms:
+            explanation += f" Terms from your description behind the match: {format_matched_terms(terms)}."
+        explanations.append(explanation)
+    recommendations["Explanation"] = explanations
+    return recommendations
+
+
+def join_answers(answer, default):
+    """Questionnaire answer (a string or a list of strings) as text, or a default when empty."""
+    if isinstance(answer, (list, tuple)):
+        answer = ", ".join(str(item) for item in answer)
+    answer = str(answer or "").strip()
+    return answer or default
+
+
+def describe_profile(profile):
+    """The 7-stage answers phrased for use in an explanation."""
+    return (
+        f"your interests in {join_answers(profile.get('interests'), 'various topics')}, "
+        f"your hobbies such as {join_answers(profile.get('hobbies'), 'exploring new activities')}, "
+        f"your strengths like {join_answers(profile.get('strengths'), 'being adaptable')}, "
+        f"and your career goals of {join_answers(profile.get('career_goals'), 'finding a fulfilling career')}"
+    )
+
+
+def add_profile_explanations(recommendations, profile, explanation_system=None, start=0):
+    """
+    Fill the Explanation column of 7-stage results from their matched terms.
+
+    Templates are picked by ranked position (the first row being at `start`), so the
+    same results always read the same, however they are paged.
+    """
+    explanation_system = explanation_system or RecommendationExplanationSystem()
+    user_input = describe_profile(profile)
+    explanations = []
+    for position, (title, university, score, terms) in enumerate(zip(
+        recommendations['Course Title'], recommendations['University Name'],
+        recommendations['similarity_score'], recommendations[MATCHED_TERMS]
+    )):
+        if terms:
+            context_match = f"This program directly matches your interest in {format_matched_terms(terms)}."
+        else:
+            context_match = "This course offers a unique opportunity to explore new areas aligned with your aspirations."
+        explanations.append(explanation_system.generate_explanation(
+            course_title=str(title),
+            university=str(university),
+            similarity_score=score,
+            user_input=user_input,
+            context_match=context_match,
+            variant=start + position
+        ))
+    recommendations["Explanation"] = explanations
+    return recommendations
+
+
+def codes_array_name(column):
+    """Artifact array name holding the filter codes of a catalog column."""
+    return column.lower().replace(" ", "_") + "_codes"
+
+
+def make_vectorizer():
+    """Create the TF-IDF vectorizer used for both the catalog and user queries."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    return TfidfVectorizer(stop_words='english', ngram_range=(1, 2), max_features=5000)
+
+
+class RecommendationEngine:
+    def __init__(self, catalog_path=CATALOG_PATH, rankings_path=RANKINGS_PATH, index_dir=INDEX_DIR):
+        self.catalog_path = catalog_path
+        self.rankings_path = rankings_path
+        self.index_dir = index_dir
+        self.df = None  # Text columns of the cleaned catalog
+        self.vectorizer = None
+        self.tfidf_matrix = None
+
+        # Numeric catalog columns, kept as flat arrays so they can be memory-mapped
+        self.tariff_points = None  # Lower bound of the UCAS tariff (NaN when unknown)
+        self.tariff_upper = None  # Upper bound of the UCAS tariff (NaN when unknown)
+        self.universities = None  # Canonical university ids (UniversityTable)
+        self.university_ids = None  # Canonical university id per row, -1 when missing
+        self.rank_by_university = None  # Display rank per university id, UNRANKED when missing
+        self.average_rank_by_university = None  # Average rank per university id, inf when missing
+        self.rank = None  # Display rank per row, gathered from rank_by_university
+        self.university_rank = None  # Average rank per row used for tie-breaking, inf when missing
+        self.course_group = None  # Integer id per (Course Title, University Name) pair
+        self.in_duplicate_group = None  # True for rows whose pair occurs more than once
+        self.filters = None  # Precomputed filter bitmaps and tariff array
+        self.inverted = None  # Weight-sorted posting lists for query scoring
+        self.first_listings = None  # Row mask of the first listing of each course, built on first use
+        self.course_tariff = None  # TariffIndex over the first listing of each course, for live counts
+        self.feature_names = None  # Term per TF-IDF column, built on first use
+        self.version = None  # Content hash of the inputs and index format, set when loading
+
+    def index_key(self):
+        """Content hash identifying the catalog and rankings this engine is built from."""
+        return content_hash(self.catalog_path, self.rankings_path)
+
+    def load(self):
+        """Load the prebuilt index when it matches the input files, otherwise build from scratch."""
+        self.version = self.index_key()
+        state = load_index(self.index_dir, self.version) if self.index_dir else None
+        if state is None:
+            return self.build()
+
+        arrays = state["arrays"]
+        self.df = state["catalog"]
+        self.vectorizer = make_vectorizer()
+        self.vectorizer.vocabulary_ = state["vocabulary"]
+        self.vectorizer.idf_ = arrays["idf"]
+        self.tfidf_matrix = state["matrix"]
+        self.tariff_points = arrays["tariff_points"]
+        self.tariff_upper = arrays["tariff_upper"]
+        self.universities = UniversityTable(state["metadata"]["universities"])
+        if len(self.universities) != len(state["metadata"]["universities"]):
+            return self.build()  # Saved with different alias rules; the ids no longer line up
+        self.university_ids = arrays["university_ids"]
+        self.rank_by_university = arrays["rank_by_university"]
+        self.average_rank_by_university = arrays["average_rank_by_university"]
+        self.gather_university_data()
+        self.course_group = arrays["course_group"]
+        self.in_duplicate_group = arrays["in_duplicate_group"]
+
+        categories = {
+            column: CategoryIndex(arrays[codes_array_name(column)], state["metadata"]["categories"][column])
+            for column in FILTER_COLUMNS
+        }
+        tariff = TariffIndex(self.tariff_points, lower_order=arrays["tariff_lower_order"])
+        self.filters = FilterIndex(categories, tariff, RegionIndex(self.university_ids, self.universities))
+        self.inverted = InvertedIndex(arrays["postings_ptr"], arrays["postings_docs"], arrays["postings_weights"])
+        self.index_course_tariffs()
+        return self
+
+    def save(self, directory=None):
+        """Persist the fitted index so later start-ups can skip preprocessing and fitting."""
+        arrays = {
+            "idf": self.vectorizer.idf_,
+            "tariff_points": self.tariff_points,
+            "tariff_upper": self.tariff_upper,
+            "tariff_lower_order": self.filters.tariff.lower_order,
+            "university_ids": self.university_ids,
+            "rank_by_university": self.rank_by_university,
+            "average_rank_by_university": self.average_rank_by_university,
+            "course_group": self.course_group,
+            "in_duplicate_group": self.in_duplicate_group,
+            "postings_ptr": self.inverted.term_ptr,
+            "postings_docs": self.inverted.docs,
+            "postings_weights": self.inverted.weights,
+        }
+        categories = {}
+        for column, category in self.filters.categories.items():
+            arrays[codes_array_name(column)] = category.codes
+            categories[column] = category.values
+        metadata = {"categories": categories, "universities": self.universities.names}
+
+        return save_index(
+            directory or self.index_dir, self.index_key(), self.df,
+            self.vectorizer.vocabulary_, self.tfidf_matrix, arrays, metadata
+        )
+
+    def build(self, workers=None):
+        """
+        Read the catalog and rankings, preprocess every course and fit the TF-IDF model.
+
+        Args:
+            workers (int): Process-pool size for preprocessing large catalogs; None stays in-process.
+        """
+        import pandas as pd
+
+        df = pd.read_csv(self.catalog_path)
+
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"Dataset is missing required columns: {', '.join(missing_columns)}.")
+        df = df.reset_index(drop=True)
+
+        # Preprocess UCAS Tariff Points to handle ranges
+        tariff_text = df['UCAS Tariff Points'].astype(str).str.strip()
+        self.tariff_points = tariff_text.apply(extract_lower_bound).to_numpy(dtype=float)
+        self.tariff_upper = tariff_text.apply(extract_upper_bound).to_numpy(dtype=float)
+
+        # Resolve every university spelling to a canonical id: region list first, then rankings, then catalog
+        self.universities = UniversityTable(name for names in UNIVERSITY_REGIONS.values() for name in names)
+        rankings_df = self.load_rankings()
+        ranking_ids = self.universities.encode(rankings_df["University"])
+        self.university_ids = self.universities.encode(df["University Name"])
+
+        # Both ranking signals per university id: "Rank" for display, "University Rank" for tie-breaking
+        self.rank_by_university = table_array(
+            len(self.universities), UNRANKED, np.int64, ranking_ids, rankings_df["Rank"].fillna(UNRANKED)
+        )
+        self.average_rank_by_university = table_array(
+            len(self.universities), np.inf, float, ranking_ids, rankings_df["Average Rank"].fillna(np.inf)
+        )
+        self.gather_university_data()
+
+        # Group duplicate course listings once so queries can de-duplicate without pandas
+        self.course_group = df.groupby(
+            [df['Course Title'], pd.Series(self.university_ids, index=df.index)], dropna=False, sort=False
+        ).ngroup().to_numpy(dtype=np.int64)
+        self.in_duplicate_group = np.bincount(self.course_group)[self.course_group] > 1
+
+        # Preprocess descriptions
+        df['cleaned_description'] = preprocess_many(
+            df['Course Title'].fillna('') + " " +
+            df['Qualification'].fillna('') + " " +
+            df['University Name'].fillna(''),
+            workers=workers
+        )
+        self.df = df[TEXT_COLUMNS]
+        self.filters = FilterIndex.from_catalog(
+            df, TariffIndex(self.tariff_points), RegionIndex(self.university_ids, self.universities)
+        )
+
+        # Initialize TF-IDF vectorizer
+        self.vectorizer = make_vectorizer()
+        self.tfidf_matrix = self.vectorizer.fit_transform(self.df['cleaned_description'])
+        self.inverted = InvertedIndex.from_matrix(self.tfidf_matrix)
+        self.index_course_tariffs()
+        return self
+
+    def index_course_tariffs(self):
+        """
+        Sort the tariff bounds of each distinct course once, so eligibility counts are binary searches.
+
+        A course is as reachable as its most reachable listing, so each bound is the minimum over its listings.
+        """
+        course_count = int(self.course_group.max()) + 1 if self.course_group.size else 0
+        bounds = []
+        for per_row in (self.tariff_points, self.tariff_upper):
+            per_course = np.full(course_count, np.inf)
+            np.minimum.at(per_course, self.course_group, np.nan_to_num(per_row, nan=0.0))  # Unlisted: open to all
+            bounds.append(per_course)
+        self.course_tariff = TariffIndex(*bounds)
+
+    def gather_university_data(self):
+        """Per-row ranks, gathered from the per-university arrays (id -1 gathers the trailing slot)."""
+        self.rank = self.rank_by_university[self.university_ids]
+        self.university_rank = self.average_rank_by_university[self.university_ids]
+
+    def load_rankings(self):
+        """Load university rankings; a missing file leaves every university unranked."""
+        import pandas as pd
+
+        try:
+            rankings_df = pd.read_csv(self.rankings_path, header=0)
+        except FileNotFoundError:
+            return pd.DataFrame(columns=["Rank", "University", "Average Rank"])
+
+        rankings_df.columns = rankings_df.columns.str.strip()
+        rankings_df = rankings_df.rename(columns={rankings_df.columns[0]: "Rank"})
+        return rankings_df[["Rank", "University", "Average Rank"]]
+
+    def encode(self, query_text):
+        """TF-IDF query vector (1 x terms CSR) for a piece of query text."""
+        with stage_timer("encode"):
+            return self.vectorizer.transform([query_text])
+
+    def score(self, query_text, rows=None):
+        """
+        Cosine similarity of a query against catalog rows (rows are L2-normalised).
+
+        When `rows` is given only those catalog rows are scored, so a narrow filter
+        (e.g. a single region) also narrows the sparse product.
+        """
+        query_vector = self.encode(query_text)
+        matrix = self.tfidf_matrix if rows is None or rows.size == len(self.df) else self.tfidf_matrix[rows]
+        return (matrix @ query_vector.T).toarray().ravel()
+
+    def terms(self):
+        """Array mapping TF-IDF columns to their terms."""
+        if self.feature_names is None:
+            self.feature_names = self.vectorizer.get_feature_names_out()
+        return self.feature_names
+
+    def matched_terms(self, query_vector, rows, limit=MATCHED_TERMS_LIMIT):
+        """
+        The query terms contributing most to each row's score, largest first.
+
+        Query and course vectors are L2-normalised, so the elementwise product of
+        the query vector and a course row holds each term's share of the cosine
+        score. One sparse product covers all the rows at once.
+
+        Args:
+            query_vector: 1 x terms query vector from encode().
+            rows (np.ndarray): Catalog row positions.
+            limit (int): Most terms kept per row.
+
+        Returns:
+            list: One list of (term, contribution) pairs per row.
+        """
+        contributions = self.tfidf_matrix[rows].multiply(query_vector).tocsr()
+        contributions.eliminate_zeros()
+        counts = np.diff(contributions.indptr)
+        row_ids = np.repeat(np.arange(len(counts)), counts)
+
+        # Order each row's entries by contribution, then keep the first `limit`
+        order = np.lexsort((-contributions.data, row_ids))
+        position_in_row = np.arange(order.size) - np.repeat(contributions.indptr[:-1], counts)
+        keep = order[position_in_row < limit]
+
+        terms = self.terms()[contributions.indices[keep]].tolist()
+        weights = contributions.data[keep].tolist()
+        boundaries = np.cumsum(np.minimum(counts, limit)).tolist()
+        pairs = list(zip(terms, weights))
+        return [pairs[start:end] for start, end in zip([0] + boundaries[:-1], boundaries)]
+
+    def materialize(self, rows, scores):
+        """Build a results DataFrame for the given catalog row positions and their scores."""
+        results = self.df.iloc[rows].copy()
+        results['similarity_score'] = scores
+        results['UCAS Tariff Points'] = self.tariff_points[rows]
+        results['Rank'] = self.rank[rows]
+        results['University Rank'] = self.university_rank[rows]
+        results['Explanation'] = ""
+        results[MATCHED_TERMS] = [[] for _ in range(len(results))]
+        return results
+
+    def count_eligible(self, ucas_points):
+        """
+        Distinct courses reachable with a UCAS points total, answered by binary search.
+
+        Each (Course Title, University Name) pair counts once, as in the results.
+
+        Returns:
+            tuple: (courses whose tariff lower bound is reachable,
+                    courses whose whole tariff range is reachable)
+        """
+        tariff = self.course_tariff
+        return tariff.eligible_count(ucas_points), tariff.comfortable_count(ucas_points)
+
+    def deduplicate(self, rows):
+        """Keep the first catalog row of each (Course Title, University Name) pair among rows."""
+        duplicated = self.in_duplicate_group[rows]
+        if not duplicated.any():
+            return rows
+
+        # Scatter positions in reverse so each group ends up holding its first position (no sort needed)
+        positions = np.flatnonzero(duplicated)
+        groups = self.course_group[rows[positions]]
+        first = np.empty(self.course_group.size, dtype=np.intp)  # Group ids are below the row count
+        first[groups[::-1]] = positions[::-1]
+        keep = ~duplicated
+        keep[positions[first[groups] == positions]] = True
+        return rows[keep]
+
+    def candidate_rows(self, profile):
+        """Catalog rows passing a 7-stage profile's filters, one listing per course."""
+        with stage_timer("filter"):
+            ucas_points = calculate_ucas_points(profile.get('grades', []))
+
+            preferences = profile.get('preferences', {})
+            mask = self.filters.mask(ucas_points, {
+                "Duration": preferences.get('durations', []),
+                "Qualification": preferences.get('qualifications', []),
+                "Study Mode": preferences.get('study_modes', []),
+            }, profile.get('location'))
+            return self.deduplicate(np.flatnonzero(mask))
+
+    def rank_candidates(self, rows, docs, matched_scores, query_vector=None, explain=None):
+        """
+        RankedResults over candidate rows given the (ascending) rows that matched the query.
+
+        Matched rows outside the candidates are ignored; unmatched candidates score zero.
+        """
+        positions = np.searchsorted(rows, docs)
+        in_rows = positions < rows.size
+        in_rows[in_rows] = rows[positions[in_rows]] == docs[in_rows]
+
+        scores = np.zeros(rows.size)
+        scores[positions[in_rows]] = matched_scores[in_rows]
+        return RankedResults(self, rows, scores, query_vector, explain)
+
+    def profile_explainer(self, profile):
+        """Callback filling the Explanation column of a 7-stage profile's results."""
+        explanation_system = RecommendationExplanationSystem()
+        return lambda results, start=0: add_profile_explanations(results, profile, explanation_system, start)
+
+    def query_vector(self, profile):
+        """TF-IDF query vector for a profile of either kind (7-stage answers or a paragraph)."""
+        with stage_timer("preprocess"):
+            if profile.get("paragraph"):
+                query_text = preprocess_text(profile["paragraph"])
+            else:
+                query_text = combine_profile_text(profile).lower()
+        return self.encode(query_text)
+
+    def query_filters(self, profile):
+        """A 7-stage profile's filters in canonical form, e.g. for cache keys."""
+        preferences = profile.get('preferences') or {}
+        location = profile.get('location') or {}
+        regions = sorted({canonical_region(region) for region in location.get('regions', [])})
+        if set(regions) >= set(UNIVERSITY_REGIONS):
+            regions = []  # The entire UK doesn't restrict anything
+        universities = [] if regions else sorted(
+            self.universities.lookup_many(location.get('universities', [])).tolist()
+        )
+        return {
+            "ucas_points": round(float(calculate_ucas_points(profile.get('grades', []))), 6),
+            "durations": sorted(preferences.get('durations', [])),
+            "qualifications": sorted(preferences.get('qualifications', [])),
+            "study_modes": sorted(preferences.get('study_modes', [])),
+            "regions": regions,
+            "universities": universities,
+        }
+
+    def recommend(self, profile, query_vector=None):
+        """Rank the catalog for a 7-stage questionnaire profile."""
+        rows = self.candidate_rows(profile)
+        allowed = np.zeros(len(self.df), dtype=bool)
+        allowed[rows] = True
+
+        # Only courses sharing a term with the query get a non-zero score
+        if query_vector is None:
+            query_vector = self.query_vector(profile)
+        metrics.increment("scored_queries", "profile")
+        with stage_timer("score"):
+            docs, matched_scores = self.inverted.accumulate(query_vector, allowed)
+            return self.rank_candidates(rows, docs, matched_scores, query_vector, self.profile_explainer(profile))
+
+    def unique_listings(self):
+        """Row mask keeping the first catalog listing of each (Course Title, University Name) pair."""
+        if self.first_listings is None:
+            first_listings = np.zeros(len(self.df), dtype=bool)
+            first_listings[self.deduplicate(np.arange(len(self.df)))] = True
+            self.first_listings = first_listings
+        return self.first_listings
+
+    def paragraph_ranking(self, query_vector, limit):
+        """RankedResults holding the top `limit` courses for a paragraph query vector."""
+        metrics.increment("scored_queries", "paragraph")
+        with stage_timer("score"):  # Scoring and selection are interleaved here (MaxScore)
+            rows, scores = self.inverted.top_k(query_vector, limit, self.university_rank, self.unique_listings())
+        return RankedResults(self, rows, scores, query_vector, add_paragraph_explanations)
+
+    def recommend_paragraph(self, paragraph_text, limit=15):
+        """Rank the catalog for a free-text paragraph, returning the top matches."""
+        query_vector = self.query_vector({"paragraph": paragraph_text})
+        return self.paragraph_ranking(query_vector, limit).top(limit)
+
+    def ranking(self, profile, query_vector=None):
+        """
+        Complete RankedResults for a profile of either kind, for paging through every match.
+
+        Paragraph queries rank every course sharing a term with the text, rather than
+        stopping at a fixed number of results.
+        """
+        if query_vector is None:
+            query_vector = self.query_vector(profile)
+        if not profile.get("paragraph"):
+            return self.recommend(profile, query_vector)
+        metrics.increment("scored_queries", "paragraph")
+        with stage_timer("score"):
+            docs, scores = self.inverted.accumulate(query_vector, self.unique_listings())
+        matched = scores > 0
+        return RankedResults(self, docs[matched], scores[matched], query_vector, add_paragraph_explanations)
+
+    def recommend_top(self, profile, k, cache=None):
+        """
+        Top k results for a profile of either kind, served from a ResultCache when it holds them.
+
+        Args:
+            profile (dict): 7-stage profile, or {"paragraph": text}.
+            k (int): Number of results.
+            cache (ResultCache): Optional cache of rankings for this engine's version.
+
+        Returns:
+            tuple: (results DataFrame, number of candidate courses); for a paragraph query,
+            the number of courses sharing a term with the text.
+        """
+        paragraph = bool(profile.get("paragraph"))
+        query_vector = self.query_vector(profile)
+        explain = add_paragraph_explanations if paragraph else self.profile_explainer(profile)
+        if cache is not None:
+            key = query_key(
+                "paragraph" if paragraph else "profile", query_vector, {} if paragraph else self.query_filters(profile)
+            )
+            cached = cache.get(key, k)
+            if cached is not None:
+                results = RankedResults(self, cached.rows, cached.scores, query_vector, explain).top(k)
+                return results, cached.total
+
+        depth = max(k, CACHE_DEPTH) if cache is not None else k
+        if paragraph:
+            # MaxScore only ranks the top matches; counting every match is a cheaper pass
+            ranked = self.paragraph_ranking(query_vector, depth)
+            total = self.inverted.match_count(query_vector, self.unique_listings())
+        else:
+            ranked = self.recommend(profile, query_vector)
+            total = len(ranked)
+        if cache is not None:
+            cache.put(key, CachedRanking(*ranked.ranked_rows(depth), total))
+        return ranked.top(k), total
+
+    def recommend_batch(self, profiles, k=15):
+        """
+        Top-k recommendations for many profiles with one sparse product over the index.
+
+        Args:
+            profiles (list): Profile dicts shaped like CourseRecommendationApp.data; a
+                profile with a "paragraph" entry is treated as a paragraph query.
+            k (int): Results per profile.
+
+        Returns:
+            list: One results DataFrame per profile, in input order.
+        """
+        if not profiles:
+            return []
+        with stage_timer("preprocess"):
+            query_texts = [
+                preprocess_text(profile["paragraph"]) if profile.get("paragraph")
+                else combine_profile_text(profile).lower()
+                for profile in profiles
+            ]
+        with stage_timer("encode"):
+            query_vectors = self.vectorizer.transform(query_texts)
+        return [ranked.top(k) for ranked in self.rank_batch(profiles, query_vectors)]
+
+    def rank_batch(self, profiles, query_vectors):
+        """
+        RankedResults for many profiles, sharing sparse products over the posting lists.
+
+        The product scores every course matching a query, so it only pays off for broad
+        filters. A profile whose filters leave less than BATCH_MIN_CANDIDATE_SHARE of the
+        catalog is scored on its own instead, reading only its allowed rows' postings.
+
+        Profiles are taken in consecutive chunks whose product can hold at most about
+        BATCH_MAX_NONZEROS scores (estimated from the query terms' posting-list lengths),
+        and rankings are produced one at a time, so memory stays bounded however many
+        profiles are passed.
+
+        Args:
+            profiles (list): Profile dicts; a profile with a "paragraph" entry is a paragraph query.
+            query_vectors: (profiles x terms) sparse matrix, row j encoding profile j.
+
+        Yields:
+            RankedResults: One per profile, in input order.
+        """
+        query_vectors = query_vectors.tocsr()
+        # Upper bound of each product row's nonzeros: the summed lengths of its terms' posting lists
+        posting_lengths = np.diff(self.inverted.term_ptr)
+        query_rows = np.repeat(np.arange(query_vectors.shape[0]), np.diff(query_vectors.indptr))
+        estimates = np.minimum(
+            np.bincount(query_rows, weights=posting_lengths[query_vectors.indices], minlength=query_vectors.shape[0]),
+            len(self.df)
+        )
+
+        dense = np.zeros(len(self.df))  # Scores by catalog row for the profile at hand, cleared after each
+        start = 0
+        while start < len(profiles):
+            end = start + 1
+            budget = BATCH_MAX_NONZEROS - estimates[start]
+            while end < len(profiles) and estimates[end] <= budget:
+                budget -= estimates[end]
+                end += 1
+            yield from self.rank_chunk(profiles[start:end], query_vectors[start:end], dense)
+            start = end
+
+    def rank_chunk(self, profiles, query_vectors, dense):
+        """RankedResults for one chunk of rank_batch, with a zeroed dense score buffer to borrow."""
+        candidates = {}  # Canonical filters -> (candidate rows, row mask), shared by profiles with the same filters
+        plans = []  # Per profile: (candidate rows, or None for a paragraph query; allowed row mask)
+        for profile in profiles:
+            if profile.get("paragraph"):
+                # Paragraph queries only return courses that share a term with the text
+                plans.append((None, self.unique_listings()))
+                continue
+            filters = json.dumps(self.query_filters(profile), sort_keys=True)
+            if filters not in candidates:
+                rows = self.candidate_rows(profile)
+                allowed = np.zeros(len(self.df), dtype=bool)
+                allowed[rows] = True
+                candidates[filters] = (rows, allowed)
+            plans.append(candidates[filters])
+
+        # (shared profiles x courses) sparse scores; row i holds the courses matching shared profile i, unsorted
+        min_candidates = BATCH_MIN_CANDIDATE_SHARE * len(self.df)
+        shared = [j for j, (rows, _) in enumerate(plans) if rows is None or rows.size >= min_candidates]
+        product_rows = {j: i for i, j in enumerate(shared)}
+        products = None
+        if shared:
+            metrics.increment("scored_queries", "batched", len(shared))
+            with stage_timer("score"):
+                products = self.inverted.score_batch(query_vectors[shared], len(self.df))
+
+        for j, (profile, (rows, allowed)) in enumerate(zip(profiles, plans)):
+            query_vector = query_vectors[j]
+            with stage_timer("score"):
+                if j not in product_rows:
+                    metrics.increment("scored_queries", "profile")
+                    docs, matched_scores = self.inverted.accumulate(query_vector, allowed)
+                    ranked = self.rank_candidates(
+                        rows, docs, matched_scores, query_vector, self.profile_explainer(profile)
+                    )
+                else:
+                    start, end = products.indptr[product_rows[j]], products.indptr[product_rows[j] + 1]
+                    docs = products.indices[start:end]
+                    dense[docs] = products.data[start:end]
+                    if rows is None:
+                        # Courses sharing a term with the text, in catalog order as accumulate gives them
+                        matched = np.sort(docs[allowed[docs]])
+                        matched = matched[dense[matched] > 0]
+                        ranked = RankedResults(
+                            self, matched, dense[matched], query_vector, add_paragraph_explanations
+                        )
+                    else:
+                        # Gathering the candidates' scores applies the filters; unmatched candidates score zero
+                        ranked = RankedResults(
+                            self, rows, dense[rows], query_vector, self.profile_explainer(profile)
+                        )
+                    dense[docs] = 0.0
+            yield ranked
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def loaded_engine():
+    """Return the process-wide engine if it has already been loaded, without loading it."""
+    return _engine
+
+
+def get_engine():
+    """Return the process-wide engine, loading and fitting it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RecommendationEngine().load()
+        return _engine
@@ -10,7 +10,7 @@ class RecommendationExplanationSystem:
             "With your goals and interests—{user_input}—the {course_title} at {university} is an excellent fit. {context_match} This recommendation achieved a score of {similarity_score:.2f}."
         ]
 
-    def generate_explanation(self, course_title, university, similarity_score, user_input, context_match):
+    def generate_explanation(self, course_title, university, similarity_score, user_input, context_match, variant=None):
         """
         Generates a recommendation explanation dynamically for any user input.
 
@@ -20,6 +20,7 @@ class RecommendationExplanationSystem:
             similarity_score (float): The similarity score of the recommendation.
             user_input (str): The user's input describing their interests.
             context_match (str): Specific context aligning the course to user inputs.
+            variant (int, optional): Template to use (wrapping around); random when None.
 
         Returns:
             str: A dynamically generated explanation.
@@ -31,9 +32,12 @@ class RecommendationExplanationSystem:
         if not course_title.strip() or not university.strip():
             return "Course or university details are missing. Unable to generate an explanation."
 
-        # Choose a random template for explanation variety
-        import random
-        template = random.choice(self.templates)
+        # Choose a template for explanation variety
+        if variant is None:
+            import random
+            template = random.choice(self.templates)
+        else:
+            template = self.templates[variant % len(self.templates)]
 
         # Format the explanation with user input and course details
         explanation = template.format(
@@ -0,0 +1,164 @@
+"""
+Micro-batching of concurrent recommendation requests.
+
+Under load, many single-profile requests reach a worker within a few
+milliseconds of each other. The batcher scores them together. One batch is
+scored at a time; requests arriving meanwhile queue up as the next batch,
+and the first of them is its leader. Once the previous batch is done, the
+leader scores the whole queue with one sparse product
+(RecommendationEngine.rank_batch) and hands each request its ranking.
+
+- A leader waits the batching window only when other requests have already
+  queued with it, and then only until the batch is full. A leader that is
+  alone scores at once, so light traffic pays no batching latency.
+- Identical queries in flight collapse into a single computation. They are
+  identified by the same key the result cache uses: query vector plus
+  filters. Later arrivals wait for the result already being computed.
+
+Each request still builds its own results page. The page is cheap, and its
+explanation quotes that request's own answers.
+
+Useful with threaded workers (gunicorn's gthread); a sync worker only ever
+has one request in flight, so batches are always of size one.
+"""
+import threading
+import time
+
+import scipy.sparse as sp
+
+from recommendation_engine import CACHE_DEPTH, RankedResults, add_paragraph_explanations
+from result_cache import CachedRanking, query_key
+
+BATCH_WINDOW = 0.005  # Seconds a leader waits for other requests to join its batch
+MAX_BATCH_SIZE = 64
+
+
+class PendingQuery:
+    """A distinct query waiting for its batch to be scored."""
+
+    def __init__(self, key, profile, query_vector):
+        self.key = key
+        self.profile = profile
+        self.query_vector = query_vector
+        self.done = threading.Event()
+        self.ranking = None  # CachedRanking once scored
+        self.error = None
+
+
+class QueryBatcher:
+    def __init__(self, engine, window=BATCH_WINDOW, max_batch_size=MAX_BATCH_SIZE, cache=None):
+        """
+        Args:
+            engine (RecommendationEngine): Loaded engine to score with.
+            window (float): Seconds to gather a batch; 0 disables batching.
+            max_batch_size (int): Distinct queries that end the window early (a batch that
+                queued up behind a running one may be larger).
+            cache (ResultCache): Optional result cache consulted before batching.
+        """
+        self.engine = engine
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.cache = cache
+        self.condition = threading.Condition()
+        self.in_flight = {}  # Key -> PendingQuery, until its ranking is ready
+        self.batch = []  # PendingQuery objects gathered by the current leader
+        self.scoring = False  # Whether a batch is being scored
+        self.counters = {"requests": 0, "batches": 0, "batched_queries": 0, "deduplicated": 0}
+
+    def submit(self, profile, k):
+        """
+        Top k results for a profile, scored together with concurrent requests.
+
+        Returns:
+            tuple: (results DataFrame, number of candidate courses), as RecommendationEngine.recommend_top.
+        """
+        with self.condition:
+            self.counters["requests"] += 1
+        return self.run(profile, k)
+
+    def run(self, profile, k):
+        engine = self.engine
+        if k > CACHE_DEPTH:
+            return engine.recommend_top(profile, k, self.cache)  # Batched rankings only keep CACHE_DEPTH rows
+
+        paragraph = bool(profile.get("paragraph"))
+        query_vector = engine.query_vector(profile)
+        key = query_key(
+            "paragraph" if paragraph else "profile", query_vector, {} if paragraph else engine.query_filters(profile)
+        )
+
+        ranking = self.cache.get(key, k) if self.cache is not None else None
+        if ranking is None:
+            ranking = self.ranking(key, profile, query_vector)
+
+        explain = add_paragraph_explanations if paragraph else engine.profile_explainer(profile)
+        results = RankedResults(engine, ranking.rows, ranking.scores, query_vector, explain).top(k)
+        return results, ranking.total
+
+    def ranking(self, key, profile, query_vector):
+        """Ranking for a query, joining an identical in-flight query or a batch."""
+        with self.condition:
+            pending = self.in_flight.get(key)
+            if pending is not None:
+                self.counters["deduplicated"] += 1
+                leader = False
+            else:
+                pending = PendingQuery(key, profile, query_vector)
+                self.in_flight[key] = pending
+                leader = not self.batch
+                self.batch.append(pending)
+                if len(self.batch) >= self.max_batch_size:
+                    self.condition.notify_all()  # Wake the leader early
+
+        if leader:
+            self.lead()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.ranking
+
+    def lead(self):
+        """Wait for the batch being scored, gather stragglers for up to the window, then score."""
+        with self.condition:
+            while self.scoring and self.window > 0:
+                self.condition.wait()  # Requests arriving meanwhile join our batch
+            deadline = time.monotonic() + self.window
+            # Alone: scoring now beats waiting on requests that may never come
+            while 1 < len(self.batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            batch, self.batch = self.batch, []
+            self.scoring = True
+            self.counters["batches"] += 1
+            self.counters["batched_queries"] += len(batch)
+
+        try:
+            query_vectors = sp.vstack([pending.query_vector for pending in batch], format="csr")
+            rankings = self.engine.rank_batch([pending.profile for pending in batch], query_vectors)
+            for pending, ranked in zip(batch, rankings):
+                pending.ranking = CachedRanking(*ranked.ranked_rows(CACHE_DEPTH), len(ranked))
+                if self.cache is not None:
+                    self.cache.put(pending.key, pending.ranking)
+        except Exception as error:  # Every request in the batch reports it
+            for pending in batch:
+                pending.error = error
+        finally:
+            with self.condition:
+                for pending in batch:
+                    del self.in_flight[pending.key]
+                self.scoring = False
+                self.condition.notify_all()
+            for pending in batch:
+                pending.done.set()
+
+    def stats(self):
+        """Request, batch and de-duplication counters."""
+        with self.condition:
+            batches = self.counters["batches"]
+            return dict(
+                self.counters,
+                mean_batch_size=self.counters["batched_queries"] / batches if batches else 0.0,
+                window_ms=self.window * 1000,
+            )
@@ -0,0 +1,194 @@
+"""
+On-demand profiling of a live worker's requests.
+
+An admin request arms a ProfileCapture on the worker that receives it. The
+capture covers the next N requests, or every request for T seconds. The
+admin request waits until the capture is done and returns the profile.
+
+- "deterministic" mode runs each request under cProfile. The result is a
+  pstats file (or its text summary) for snakeviz, gprof2dot and similar
+  tools. Only one request is traced at a time, because newer Pythons allow
+  a single active profiler. Requests that overlap a traced one run untraced
+  and don't count towards N.
+- "sampling" mode records the stacks of the threads serving requests every
+  few milliseconds. The result is collapsed stacks ("frame;frame;frame
+  count" lines) for flamegraph.pl or speedscope. Overhead stays low, and
+  concurrent requests are all included.
+
+Only the WSGI call is profiled, so the body of a streamed response (the
+bulk endpoint) is produced outside the capture.
+
+While armed, the app's wsgi_app is wrapped. The original is put back when
+the capture ends, so an unarmed worker runs no profiling code at all.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+MODES = ["deterministic", "sampling"]
+FORMATS = {"deterministic": ["pstats", "text"], "sampling": ["collapsed"]}
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+MAX_REQUESTS = 10_000
+MAX_SECONDS = 300
+DEFAULT_TIMEOUT = 60  # Seconds a request-count capture waits for its requests
+EXCLUDED_PREFIX = "/admin/"  # Admin requests are never profiled
+
+_active_lock = threading.Lock()  # Held while a capture is armed; one capture per process
+
+
+def frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class ProfileCapture:
+    def __init__(self, mode, max_requests=None, seconds=None):
+        """
+        Args:
+            mode (str): "deterministic" or "sampling".
+            max_requests (int): Requests to profile; None profiles for `seconds` instead.
+            seconds (float): Capture length, or how long to wait for max_requests requests.
+        """
+        self.mode = mode
+        self.max_requests = max_requests
+        self.seconds = seconds if seconds is not None else DEFAULT_TIMEOUT
+        self.lock = threading.Lock()
+        self.trace_lock = threading.Lock()  # Deterministic mode traces one request at a time
+        self.done = threading.Event()
+        self.started = 0  # Requests admitted to the capture
+        self.finished = 0
+        self.profiles = []  # cProfile.Profile per traced request
+        self.active_threads = set()  # Threads serving sampled requests
+        self.samples = Counter()  # Collapsed stack -> sample count
+        self.sample_count = 0
+
+    def admit(self):
+        """Whether the next request is part of the capture."""
+        with self.lock:
+            if self.done.is_set() or (self.max_requests is not None and self.started >= self.max_requests):
+                return False
+            self.started += 1
+            return True
+
+    def complete_request(self):
+        with self.lock:
+            self.finished += 1
+            if self.max_requests is not None and self.finished >= self.max_requests:
+                self.done.set()
+
+    def wrap(self, wsgi_app):
+        """WSGI app that profiles admitted requests and passes everything else straight through."""
+
+        def profiled_app(environ, start_response):
+            if environ.get("PATH_INFO", "").startswith(EXCLUDED_PREFIX):
+                return wsgi_app(environ, start_response)
+            if self.mode == "deterministic":
+                if not self.trace_lock.acquire(blocking=False):
+                    return wsgi_app(environ, start_response)  # Another request is being traced
+                try:
+                    if not self.admit():
+                        return wsgi_app(environ, start_response)
+                    profile = cProfile.Profile()
+                    try:
+                        return profile.runcall(wsgi_app, environ, start_response)
+                    finally:
+                        with self.lock:
+                            self.profiles.append(profile)
+                        self.complete_request()
+                finally:
+                    self.trace_lock.release()
+
+            if not self.admit():
+                return wsgi_app(environ, start_response)
+            thread = threading.get_ident()
+            with self.lock:
+                self.active_threads.add(thread)
+            try:
+                return wsgi_app(environ, start_response)
+            finally:
+                with self.lock:
+                    self.active_threads.discard(thread)
+                self.complete_request()
+
+        return profiled_app
+
+    def sample(self):
+        """Sampler loop: record the stacks of threads serving requests until the capture ends."""
+        while not self.done.wait(SAMPLE_INTERVAL):
+            with self.lock:
+                threads = list(self.active_threads)
+            if not threads:
+                continue
+            frames = sys._current_frames()
+            for thread in threads:
+                frame = frames.get(thread)
+                stack = []
+                while frame is not None:
+                    stack.append(frame_name(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    with self.lock:
+                        self.samples[";".join(reversed(stack))] += 1
+                        self.sample_count += 1
+
+    def run(self, app):
+        """
+        Arm the capture on a Flask app, wait until it is done, then disarm.
+
+        Raises:
+            RuntimeError: If another capture is already armed in this process.
+        """
+        if not _active_lock.acquire(blocking=False):
+            raise RuntimeError("A profile capture is already running on this worker.")
+        original = app.wsgi_app
+        sampler = None
+        try:
+            if self.mode == "sampling":
+                sampler = threading.Thread(target=self.sample, name="profile-sampler", daemon=True)
+                sampler.start()
+            app.wsgi_app = self.wrap(original)
+            self.done.wait(self.seconds)
+        finally:
+            app.wsgi_app = original
+            self.done.set()
+            if sampler is not None:
+                sampler.join()
+            _active_lock.release()
+        if self.mode == "deterministic":
+            self.trace_lock.acquire()  # Let a request still being traced finish its profile
+            self.trace_lock.release()
+
+    def result(self, output_format):
+        """
+        The aggregated profile.
+
+        Returns:
+            tuple: (bytes, MIME type, file extension)
+        """
+        if self.mode == "sampling":
+            with self.lock:
+                lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+            return ("\n".join(lines) + "\n").encode(), "text/plain", "collapsed"
+
+        with self.lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return b"", "application/octet-stream", "pstats"
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        if output_format == "text":
+            stream = io.StringIO()
+            stats.stream = stream
+            stats.sort_stats("cumulative").print_stats(50)
+            return stream.getvalue().encode(), "text/plain", "txt"
+        return marshal.dumps(stats.stats), "application/octet-stream", "pstats"  # As Stats.dump_stats writes it
+
+    def summary(self):
+        """Requests and samples captured."""
+        with self.lock:
+            return {"requests": self.finished, "samples": self.sample_count}
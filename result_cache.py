@@ -0,0 +1,301 @@
+"""
+Two-tier cache of ranked recommendation results.
+
+Entries are keyed by a hash of what actually determines the ranking: the
+query's TF-IDF vector (the preprocessed, weighted query terms) plus the
+filters. Near-identical profiles that differ only in wording or ordering
+that preprocessing removes therefore share an entry. An entry holds the
+catalog rows and scores of the top results, plus the candidate count.
+Results are rebuilt from the engine on a hit, so explanations still quote
+each user's own answers.
+
+- Tier 1 is an in-process LRU with a TTL.
+- Tier 2 is an SQLite file shared by every process on the machine. It
+  survives restarts.
+
+Every entry is tagged with the engine's artifact version, a content hash of
+the catalog, the rankings and the index format. An entry from any other
+version is never served. It is not deleted either, since workers of an older
+version may still share the file during a rolling restart; stale entries age
+out of the SQLite tier by TTL and the entry cap like any other.
+
+Only the in-memory tier is locked. Each thread talks to SQLite through its own
+connection, and writes are queued and committed in batches rather than one
+transaction per result: once DISK_COMMIT_ENTRIES are queued, by a background
+thread once the oldest has waited DISK_COMMIT_INTERVAL seconds, when the cache
+is closed, and at exit. A batch that fails to commit is dropped and counted.
+"""
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_PATH = "result_cache.sqlite"
+MEMORY_ENTRIES = 2048
+MEMORY_TTL = 10 * 60  # Seconds
+DISK_TTL = 7 * 24 * 60 * 60  # Seconds
+DISK_ENTRIES = 200_000  # Oldest entries beyond this are pruned
+DISK_COMMIT_ENTRIES = 64  # Queued writes that trigger a commit
+DISK_COMMIT_INTERVAL = 2.0  # Seconds a queued write may wait for its commit
+DISK_PRUNE_INTERVAL = 60 * 60  # Seconds between prunes of expired and excess entries
+
+_open_tiers = weakref.WeakSet()  # Live SqliteTiers, so the flusher and exit hook never keep one alive
+_flusher_pid = None  # Process running the background flusher; threads don't survive a fork
+_flusher_lock = threading.Lock()
+
+
+def query_key(kind, query_vector, filters):
+    """
+    Cache key for a query.
+
+    Args:
+        kind (str): "profile" or "paragraph".
+        query_vector: 1 x terms sparse query vector (sorted indices).
+        filters (dict): JSON-serialisable filters, already in canonical (sorted) form.
+    """
+    query_vector = query_vector.tocsr()
+    query_vector.sort_indices()
+    digest = hashlib.sha256(kind.encode())
+    digest.update(np.ascontiguousarray(query_vector.indices, dtype="<i8").tobytes())
+    digest.update(np.ascontiguousarray(query_vector.data, dtype="<f8").tobytes())
+    digest.update(json.dumps(filters, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class CachedRanking:
+    """The top rows of a ranking: catalog row positions and scores in rank order."""
+
+    def __init__(self, rows, scores, total):
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.total = int(total)  # Candidates in the full ranking
+
+    def covers(self, k):
+        """Whether the top k results are all held here."""
+        return self.rows.size >= min(k, self.total)
+
+
+class MemoryTier:
+    def __init__(self, max_entries=MEMORY_ENTRIES, ttl=MEMORY_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # Key -> (expiry time, CachedRanking)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, ranking = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return ranking
+
+    def put(self, key, ranking):
+        self.entries[key] = (time.monotonic() + self.ttl, ranking)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def flush_open_tiers(due_only=False):
+    """Commit the queued writes of every live SQLite tier (only those that have waited long enough if due_only)."""
+    for tier in list(_open_tiers):
+        tier.flush(due_only)
+
+
+def flush_periodically():
+    while True:
+        time.sleep(DISK_COMMIT_INTERVAL / 2)
+        flush_open_tiers(due_only=True)
+
+
+def start_flusher():
+    """Start this process's background flusher, once per process."""
+    global _flusher_pid
+    with _flusher_lock:
+        if _flusher_pid != os.getpid():
+            threading.Thread(target=flush_periodically, name="result-cache-flush", daemon=True).start()
+            _flusher_pid = os.getpid()
+
+
+atexit.register(flush_open_tiers)
+
+
+class SqliteTier:
+    def __init__(self, path, version, ttl=DISK_TTL, max_entries=DISK_ENTRIES):
+        self.path = path
+        self.version = version
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.local = threading.local()  # Per-thread connection; SQLite connections aren't shared
+        self.pending_lock = threading.Lock()
+        self.pending = []  # Rows waiting for the next commit
+        self.oldest_pending = None
+        self.last_prune = None  # Pruned on first write, then every DISK_PRUNE_INTERVAL
+        self.write_errors = 0  # Failed commits
+        self.dropped = 0  # Writes lost to failed commits
+        _open_tiers.add(self)
+
+    def connect(self):
+        """This thread's connection, opened on first use (and again after a fork)."""
+        local = self.local
+        if getattr(local, "pid", None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")  # A lost cache write only costs a recomputation
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, version TEXT, created REAL, total INTEGER, rows BLOB, scores BLOB)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+            connection.commit()
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def get(self, key):
+        row = self.connect().execute(
+            "SELECT total, rows, scores FROM results WHERE key = ? AND version = ? AND created >= ?",
+            (key, self.version, time.time() - self.ttl)
+        ).fetchone()
+        if row is None:
+            return None
+        total, rows, scores = row
+        return CachedRanking(np.frombuffer(rows, dtype="<i8"), np.frombuffer(scores, dtype="<f8"), total)
+
+    def put(self, key, ranking):
+        """Queue a write; commits at once when enough writes are queued, otherwise the flusher does."""
+        row = (key, self.version, time.time(), ranking.total,
+               ranking.rows.astype("<i8").tobytes(), ranking.scores.astype("<f8").tobytes())
+        with self.pending_lock:
+            self.pending.append(row)
+            if self.oldest_pending is None:
+                self.oldest_pending = time.monotonic()
+            full = len(self.pending) >= DISK_COMMIT_ENTRIES
+        if full:
+            self.flush()
+        else:
+            start_flusher()
+
+    def flush(self, due_only=False):
+        """
+        Commit the queued writes in one transaction, pruning the file when a prune is due.
+
+        A failed commit drops its writes (counted in `dropped`) rather than retrying them forever.
+        """
+        with self.pending_lock:
+            waited = self.oldest_pending is not None and time.monotonic() - self.oldest_pending >= DISK_COMMIT_INTERVAL
+            if due_only and not waited:
+                return
+            rows, self.pending, self.oldest_pending = self.pending, [], None
+            prune = self.last_prune is None or time.monotonic() - self.last_prune >= DISK_PRUNE_INTERVAL
+            if prune:
+                self.last_prune = time.monotonic()
+        if not rows and not prune:
+            return
+        try:
+            connection = self.connect()
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", rows)
+                if prune:
+                    connection.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl,))
+                    connection.execute(
+                        "DELETE FROM results WHERE key IN "
+                        "(SELECT key FROM results ORDER BY created DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+                    )
+        except sqlite3.Error:
+            with self.pending_lock:
+                self.write_errors += 1
+                self.dropped += len(rows)
+
+
+class ResultCache:
+    """
+    In-process LRU in front of an optional SQLite tier, both tied to one artifact version.
+
+    Thread-safe: the lock covers the LRU and counters only, never SQLite calls.
+    Counters are per process.
+    """
+
+    def __init__(self, version, path=CACHE_PATH, memory_entries=MEMORY_ENTRIES, memory_ttl=MEMORY_TTL,
+                 disk_ttl=DISK_TTL):
+        """
+        Args:
+            version (str): Artifact version of the engine the results come from.
+            path (str): SQLite file for the second tier; None keeps the cache in memory only.
+        """
+        self.version = version
+        self.memory = MemoryTier(memory_entries, memory_ttl)
+        self.disk = SqliteTier(path, version, disk_ttl) if path else None
+        self.lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_errors": 0}
+
+    def get(self, key, k):
+        """Cached ranking covering the top k results, or None."""
+        with self.lock:
+            ranking = self.memory.get(key)
+            if ranking is not None and ranking.covers(k):
+                self.counters["memory_hits"] += 1
+                return ranking
+
+        ranking, counter = None, "misses"
+        if self.disk is not None:
+            try:
+                ranking = self.disk.get(key)
+            except sqlite3.Error:
+                self.count("disk_errors")
+            if ranking is not None and ranking.covers(k):
+                counter = "disk_hits"
+            else:
+                ranking = None
+
+        with self.lock:
+            self.counters[counter] += 1
+            if ranking is not None:
+                self.memory.put(key, ranking)
+        return ranking
+
+    def put(self, key, ranking):
+        with self.lock:
+            self.memory.put(key, ranking)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, ranking)
+            except sqlite3.Error:
+                self.count("disk_errors")  # The disk tier is best-effort
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def close(self):
+        """Commit any queued disk writes; call when the cache is replaced."""
+        if self.disk is not None:
+            self.disk.flush()
+
+    def stats(self):
+        """Hit/miss counters and tier sizes."""
+        with self.lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = lookups - self.counters["misses"]
+            disk_write_errors = self.disk.write_errors if self.disk is not None else 0
+            return dict(
+                self.counters,
+                disk_errors=self.counters["disk_errors"] + disk_write_errors,
+                disk_dropped=self.disk.dropped if self.disk is not None else 0,
+                lookups=lookups,
+                hit_rate=hits / lookups if lookups else 0.0,
+                memory_entries=len(self.memory),
+                version=self.version,
+            )
@@ -0,0 +1,262 @@
+"""
+Server-side result cursors for paging through a query's results.
+
+A client that asks for a cursor gets an opaque token with its first page.
+Later pages, and the "Sort by Best Universities" order, are served from the
+query's ranking, which the worker keeps in memory (CursorRanking). The query
+is scored once. After that, a page costs a slice of the ranked prefix, grown
+with select_top_k when a page runs past it, plus building that page's rows.
+The handle keeps the matched courses' rows and scores, plus the zero-score
+candidates' rows only, since those rank by university alone. A cursor serves
+the same ranking and total as the same query without one.
+
+The token carries the query itself (compressed JSON), the artifact version
+and an expiry time, so any worker can serve it. A worker that does not hold
+the ranking re-scores the query once and keeps it. That happens when the
+request lands on another process, after a restart, or after eviction.
+Concurrent pages of the same cursor share that one re-scoring.
+Tokens are opaque to clients but not secret: editing one just makes a
+different query. Tokens from another artifact version, or past their
+expiry, are rejected.
+
+Rankings are held per process in an LRU bounded by memory (MAX_BYTES), charged
+for what each handle holds as its prefix grows, and dropped when their token
+expires.
+"""
+import base64
+import binascii
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+from api_schema import parse_profile
+from recommendation_engine import SORT_UNIVERSITY, RankedResults, order_by_university
+
+CURSOR_TTL = 15 * 60  # Seconds a cursor stays valid after its first page
+MAX_BYTES = 256 * 1024 * 1024  # Memory for held rankings, per process
+VERSION_PREFIX = 16  # Characters of the artifact version kept in a token
+# Longest token, leaving room for the rest of a GET /recommendation/page request line
+# within gunicorn's limit_request_line (8190 bytes, see gunicorn.conf.py)
+MAX_TOKEN_CHARS = 6 * 1024
+
+
+class CursorExpired(ValueError):
+    """A well-formed cursor that can no longer be served (expired, or from another index version)."""
+
+
+def encode_cursor(profile, version, expires):
+    """
+    Opaque, URL-safe token for a profile's ranking.
+
+    Raises:
+        ValueError: If the profile is too large to fit in a token.
+    """
+    payload = json.dumps({"p": profile, "v": version[:VERSION_PREFIX], "e": int(expires)}, separators=(",", ":"))
+    token = base64.urlsafe_b64encode(zlib.compress(payload.encode())).decode().rstrip("=")
+    if len(token) > MAX_TOKEN_CHARS:
+        raise ValueError("The profile is too large to page with a cursor; shorten it or request without one.")
+    return token
+
+
+def decode_cursor(token, version):
+    """
+    The profile and expiry time carried by a token.
+
+    Raises:
+        CursorExpired: If the token has expired or belongs to another artifact version.
+        ValueError: If the token is malformed or longer than any issued token.
+    """
+    if len(token) > MAX_TOKEN_CHARS:
+        raise ValueError(f"'cursor' is longer than {MAX_TOKEN_CHARS} characters, so it is not a valid cursor.")
+    try:
+        payload = zlib.decompress(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        data = json.loads(payload)
+        profile, token_version, expires = data["p"], data["v"], float(data["e"])
+    except (binascii.Error, zlib.error, ValueError, TypeError, KeyError):
+        raise ValueError("'cursor' is not a valid cursor.") from None
+
+    if token_version != version[:VERSION_PREFIX]:
+        raise CursorExpired("The cursor belongs to an older version of the course index; run the query again.")
+    if expires < time.time():
+        raise CursorExpired("The cursor has expired; run the query again.")
+    return parse_profile(profile), expires
+
+
+class CursorRanking:
+    """
+    The ranking behind a cursor, scored once and ranked lazily.
+
+    Holds the matched courses' rows and scores, whose ranked prefix grows with
+    select_top_k as pages need it, and the zero-score candidates' rows (as int32),
+    which rank after every match by university rank. Offers the len() and page()
+    of RankedResults, which app.page_response uses.
+    """
+
+    def __init__(self, engine, profile):
+        self.engine = engine
+        self.query_vector = engine.query_vector(profile)
+        ranked = engine.ranking(profile, self.query_vector)
+        matched = ranked.scores > 0
+        self.explain = ranked.explain
+        self.total = len(ranked)  # Every candidate, as recommend_top counts them
+        self.matched = RankedResults(engine, ranked.rows[matched], ranked.scores[matched])
+        self.unmatched = ranked.rows[~matched].astype(np.int32)  # Catalog order
+        self.unmatched_order = None  # Positions into unmatched by university rank, sorted on first use
+        self.resized = None  # Called after a page grows the memory held (set by CursorStore)
+
+    def __len__(self):
+        return self.total
+
+    def ranked_rows(self, end):
+        """Rows and scores of the top `end` results."""
+        rows, scores = self.matched.ranked_rows(end)
+        if end <= len(self.matched):
+            return rows, scores
+        order = self.unmatched_order  # Read once: another thread may sort it meanwhile
+        if order is None:
+            # As select_top_k breaks ties: university rank, then catalog order
+            order = np.argsort(self.engine.university_rank[self.unmatched], kind="stable").astype(np.int32)
+            self.unmatched_order = order
+        tail = self.unmatched[order[:end - rows.size]].astype(np.int64)
+        return np.concatenate([rows, tail]), np.concatenate([scores, np.zeros(tail.size)])
+
+    def page(self, start, count, sort):
+        """Results start to start + count, as RankedResults.page; no scoring happens here."""
+        end = min(start + count, self.total)
+        start = min(start, end)  # A page past the end is empty
+        held = self.nbytes()
+        rows, scores = self.ranked_rows(end)
+        if self.resized is not None and self.nbytes() != held:
+            self.resized()
+        handle = RankedResults(self.engine, rows, scores, self.query_vector, self.explain)
+        results = handle.materialize(rows[start:end], scores[start:end], start)
+        return order_by_university(results) if sort == SORT_UNIVERSITY else results
+
+    def nbytes(self):
+        """Memory currently held: matched rows, scores and ranked prefix, unmatched rows, query vector."""
+        order = self.unmatched_order
+        return (self.matched.rows.nbytes + self.matched.scores.nbytes + self.matched.order.nbytes
+                + self.unmatched.nbytes + (0 if order is None else order.nbytes)
+                + self.query_vector.data.nbytes + self.query_vector.indices.nbytes)
+
+
+class CursorStore:
+    """
+    Rankings behind live cursors, kept by one process for one engine.
+
+    Thread-safe; counters are per process.
+    """
+
+    def __init__(self, engine, ttl=CURSOR_TTL, max_bytes=MAX_BYTES):
+        """
+        Args:
+            engine (RecommendationEngine): Loaded engine the rankings come from.
+            ttl (float): Seconds a new cursor stays valid.
+            max_bytes (int): Memory for held rankings; least recently used ones are dropped beyond it.
+        """
+        self.engine = engine
+        self.version = engine.version
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # Token -> (expiry time, CursorRanking, bytes charged for it)
+        self.rescoring = {}  # Token -> Future of its CursorRanking, while one request re-scores it
+        self.held_bytes = 0
+        self.counters = {"opened": 0, "hits": 0, "rescored": 0, "deduplicated": 0, "expired": 0, "evicted": 0}
+
+    def open(self, profile):
+        """
+        Rank a profile and keep the ranking behind a new cursor.
+
+        Returns:
+            tuple: (cursor token, CursorRanking)
+
+        Raises:
+            ValueError: If the profile is too large to fit in a token.
+        """
+        expires = time.time() + self.ttl
+        token = encode_cursor(profile, self.version, expires)
+        ranked = CursorRanking(self.engine, profile)
+        self.keep(token, expires, ranked, "opened")
+        return token, ranked
+
+    def get(self, token):
+        """
+        CursorRanking behind a cursor, re-scoring the query if this process doesn't hold it.
+
+        Concurrent requests for the same missing cursor wait for a single re-scoring.
+        """
+        profile, expires = decode_cursor(token, self.version)
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is not None:
+                self.entries.move_to_end(token)
+                self.counters["hits"] += 1
+                return entry[1]
+            future = self.rescoring.get(token)
+            leader = future is None
+            if leader:
+                future = self.rescoring[token] = Future()
+            else:
+                self.counters["deduplicated"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            ranked = CursorRanking(self.engine, profile)
+            self.keep(token, expires, ranked, "rescored")
+            future.set_result(ranked)
+        except Exception as error:  # Every waiting request reports it
+            future.set_exception(error)
+        finally:
+            with self.lock:
+                del self.rescoring[token]
+        return future.result()
+
+    def keep(self, token, expires, ranked, counter):
+        with self.lock:
+            self.counters[counter] += 1
+            now = time.time()
+            for expired in [key for key, (expiry, _, _) in self.entries.items() if expiry < now]:
+                self.drop(expired)
+                self.counters["expired"] += 1
+
+            if token in self.entries:
+                self.drop(token)
+            charged = ranked.nbytes()
+            self.entries[token] = (expires, ranked, charged)
+            self.held_bytes += charged
+            ranked.resized = lambda: self.recharge(token, ranked)
+            self.evict()
+
+    def recharge(self, token, ranked):
+        """Re-count a ranking's memory after a page grew it."""
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None or entry[1] is not ranked:
+                return  # Dropped or replaced meanwhile
+            charged = ranked.nbytes()
+            self.held_bytes += charged - entry[2]
+            self.entries[token] = (entry[0], ranked, charged)
+            self.evict()
+
+    def evict(self):
+        # Always keep the newest entry, even if it alone exceeds the budget
+        while self.held_bytes > self.max_bytes and len(self.entries) > 1:
+            self.drop(next(iter(self.entries)))
+            self.counters["evicted"] += 1
+
+    def drop(self, token):
+        _, _, charged = self.entries.pop(token)
+        self.held_bytes -= charged
+
+    def stats(self):
+        """Cursor counters and the memory held."""
+        with self.lock:
+            return dict(self.counters, cursors=len(self.entries), held_bytes=self.held_bytes,
+                        ttl_seconds=self.ttl, version=self.version)
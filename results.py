@@ -1,23 +1,17 @@
+import logging
+
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QPushButton, QScrollArea,
+    QWidget, QVBoxLayout, QPushButton, QScrollArea,
     QHeaderView, QLabel, QSpacerItem, QSizePolicy, QMessageBox, QProgressBar, QDialog, QDialogButtonBox, QComboBox
 )
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
-from sklearn.feature_extraction.text import TfidfVectorizer  # For NLP-based keyword extraction
-from sklearn.metrics.pairwise import cosine_similarity  # (If used elsewhere)
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-import pandas as pd
-import nltk
-import random  # For randomly choosing templates
-from recommendation_model import RecommendationExplanationSystem
-
-# Ensure NLTK is initialized
-nltk.download("stopwords")
-nltk.download("punkt")
-nltk.download("wordnet")
+from recommendation_engine import CATALOG_PATH, SORT_COMPATIBILITY, SORT_UNIVERSITY, get_engine
+from query_runner import QueryRunner
+from results_table import ResultsTableView
+from stage_metrics import stage_timer
+
+logger = logging.getLogger(__name__)
 
 
 class ResultsPage(QWidget):
@@ -25,80 +19,24 @@ class ResultsPage(QWidget):
         super().__init__(parent)
         self.parent = parent
         self.data = {}
-        self.results = pd.DataFrame()
+        self.results = None  # First page of results, set once recommendations are made
+        self.ranked = None  # Lazily ranked engine results; pages are sliced from it as they are displayed
         self.results_displayed = 0
         self.batch_size = 15  # Number of results to display per batch
-        self.explanation_system = RecommendationExplanationSystem()  # Instantiate explanation system
-        self.load_dataset()
+
+        # Queries run on a worker thread; results come back through signals
+        self.query_runner = QueryRunner(self)
+        self.query_runner.finished.connect(self.show_recommendations)
+        self.query_runner.failed.connect(self.show_query_error)
         self.init_ui()
 
-    def preprocess_text(self, text):
-        stop_words = set(stopwords.words("english"))
-        lemmatizer = WordNetLemmatizer()
-
-        tokens = word_tokenize(text.lower())
-        cleaned_tokens = [
-            lemmatizer.lemmatize(token)
-            for token in tokens if token.isalnum() and token not in stop_words
-        ]
-        return " ".join(cleaned_tokens)
-
-    def load_dataset(self):
-        self.file_path = "combined_university_courses.csv"
-        try:
-            self.df = pd.read_csv(self.file_path)
-        except FileNotFoundError:
-            QMessageBox.critical(self, "Error", f"Dataset file '{self.file_path}' not found.")
-            return
-
-        if 'Course Title' in self.df.columns:
-            self.df['cleaned_description'] = (
-                self.df['Course Title'].fillna('') + " " +
-                self.df['Qualification'].fillna('') + " " +
-                self.df['University Name'].fillna('')
-            )
+    def show_query_error(self, error):
+        """Report a query that failed, e.g. because the catalog could not be loaded."""
+        self.busy_indicator.setVisible(False)
+        if isinstance(error, FileNotFoundError):
+            QMessageBox.critical(self, "Error", f"Dataset file '{CATALOG_PATH}' not found.")
         else:
-            QMessageBox.critical(self, "Error", "Dataset must contain a 'Course Title' column.")
-            return
-
-        # Preprocess UCAS Tariff Points to handle ranges
-        if 'UCAS Tariff Points' in self.df.columns:
-            def extract_lower_bound(value):
-                try:
-                    if '-' in value:  # Handle ranges like "104-112"
-                        return float(value.split('-')[0])
-                    return float(value)  # Handle single numeric values
-                except (ValueError, TypeError):
-                    return None  # Return None for invalid entries
-
-            self.df['UCAS Tariff Points'] = self.df['UCAS Tariff Points'].apply(
-                lambda x: extract_lower_bound(str(x).strip())
-            )
-
-        # Preprocess descriptions
-        self.df['cleaned_description'] = self.df['cleaned_description'].apply(self.preprocess_text)
-
-        # Load university rankings (focus on the first two columns only)
-        try:
-            self.rankings_df = pd.read_csv("UK_University_Rankings_-_Full_Inclusive_List.csv", usecols=[0, 1], header=0)
-            self.rankings_df.columns = ["Rank", "University"]  # Rename columns for clarity
-        except FileNotFoundError:
-            QMessageBox.critical(self, "Error", "Rankings file not found.")
-            self.rankings_df = pd.DataFrame(columns=["Rank", "University"])
-
-        # Ensure column names match
-        if "University" not in self.rankings_df.columns:
-            QMessageBox.critical(self, "Error", "Rankings file must contain a 'University' column.")
-            return
-
-        # Merge rankings with main dataset
-        self.df = self.df.merge(
-            self.rankings_df, left_on="University Name", right_on="University", how="left"
-        ).fillna({"Rank": float("inf")})  # Assign infinity for missing ranks
-
-        # Initialize TF-IDF vectorizer
-        self.vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), max_features=5000)
-        self.tfidf_matrix = self.vectorizer.fit_transform(self.df['cleaned_description'])
+            QMessageBox.critical(self, "Error", str(error))
 
 
     def init_ui(self):
@@ -123,21 +61,22 @@ class ResultsPage(QWidget):
         self.sorting_dropdown.currentIndexChanged.connect(self.sort_results)
         self.layout.addWidget(self.sorting_dropdown, alignment=Qt.AlignCenter)
 
+        # Busy indicator shown while a query runs in the background
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0)
+        self.busy_indicator.setMaximumWidth(300)
+        self.busy_indicator.setVisible(False)
+        self.layout.addWidget(self.busy_indicator, alignment=Qt.AlignCenter)
+
         # Results Table
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(10)  # Includes "University Rank" and "Explanation"
-        self.results_table.setHorizontalHeaderLabels(
-            [
-                "Compatibility", "Course Title", "University Name", "Duration",
-                "Qualification", "Study Mode", "UCAS Points", "Course URL", "Explanation", "University Rank"
-            ]
-        )
+        self.results_table = ResultsTableView()  # Includes "University Rank" and "Explanation"
         self.results_table.horizontalHeader().setStretchLastSection(False)
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.results_table.verticalHeader().setDefaultSectionSize(50)  # Increase row height
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.results_table.setAlternatingRowColors(True)
         self.results_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #40797d;
                 background-color: #f9f9f9;
                 gridline-color: #40797d;
@@ -152,23 +91,23 @@ class ResultsPage(QWidget):
                 border: 1px solid #40797d;
                 padding: 8px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 10px;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #b4d9dc;
                 color: black;
             }
-            QTableWidget::item:focus {
+            QTableView::item:focus {
                 outline: none;
             }
-            QTableWidget::alternate {
+            QTableView::alternate {
                 background-color: #eef6f7;
             }
         """)
 
-        # Connect cell click signal to popup handler
-        self.results_table.cellClicked.connect(self.show_explanation_popup_from_table)
+        # Clicking an explanation button shows the popup
+        self.results_table.explanation_requested.connect(self.show_explanation_popup)
 
         # Scrollable Area
         self.scroll_area = QScrollArea()
@@ -206,15 +145,6 @@ class ResultsPage(QWidget):
 
 
 
-    def show_explanation_popup_from_table(self, row, column):
-        """Handle clicking on the explanation cell to show a popup."""
-        explanation_column_index = 8  # Column index for Explanation
-        if column == explanation_column_index:  # Check if the clicked cell is in the Explanation column
-            explanation_item = self.results_table.item(row, column)
-            if explanation_item:  # Ensure the cell is not empty
-                explanation_text = explanation_item.text()
-                self.show_explanation_popup(explanation_text)  # Reuse the existing popup method
-
     def show_explanation_popup(self, explanation):
         """Show the explanation in a popup dialog."""
         dialog = QDialog(self)
@@ -237,15 +167,6 @@ class ResultsPage(QWidget):
 
         dialog.exec_()
 
-    def show_explanation_popup_from_table(self, row, column):
-        """Handle clicking on the explanation cell to show a popup."""
-        explanation_column_index = 8  # Column index for Explanation
-        if column == explanation_column_index:  # Check if the clicked cell is in the Explanation column
-            explanation_item = self.results_table.item(row, column)
-            if explanation_item:  # Ensure the cell is not empty
-                explanation_text = explanation_item.text()
-                self.show_explanation_popup(explanation_text)  # Reuse the existing popup method
-
     def show_explanation_popup(self, explanation):
         """Show the explanation in a popup dialog."""
         dialog = QDialog(self)
@@ -264,226 +185,49 @@ class ResultsPage(QWidget):
 
         dialog.exec_()
 
-    def sort_results(self):
-        """Sort only the first 15 results based on dropdown selection."""
-        
-        # Ensure rankings are preloaded for all results
-        if "Rank" not in self.results.columns:
-            self.results = self.results.merge(
-                self.rankings_df, left_on="University Name", right_on="University", how="left"
-            )
-
-        # **Fix: Convert Rank to numeric safely**
-        self.results["Rank"] = self.results["Rank"].replace(">131", 999)  # Replace '>131' with a high numeric value
-        self.results["Rank"] = pd.to_numeric(self.results["Rank"], errors="coerce").fillna(999).astype(int)  # Convert safely
-
-        if self.sorting_dropdown.currentIndex() == 0:  # Sort by Compatibility
-            # Sort by similarity score in descending order
-            self.results.sort_values(by="similarity_score", ascending=False, inplace=True)
-            self.results_displayed = 0
-            self.results_table.setRowCount(0)
-            self.load_more_results()
-
-        elif self.sorting_dropdown.currentIndex() == 1:  # Sort by Best Universities
-            # Extract the top 15 most compatible universities
-            top_compatibility_results = self.results.head(15).copy()
-
-            # **Ensure rankings are formatted correctly before sorting**
-            top_compatibility_results["Rank"] = top_compatibility_results["Rank"].apply(
-                lambda x: ">131" if x == 999 else str(int(x))
-            )
-
-            # Sort by University Rank (low numbers first, "999" as highest rank)
-            sorted_results = top_compatibility_results.sort_values(by="Rank", ascending=True, key=lambda x: x.replace(">131", "999").astype(int))
-
-            # Reset the table and load sorted results
-            self.results_table.setRowCount(0)
-            self.results_displayed = 0
-
-            # Load only the sorted top 15 results
-            for _, row in sorted_results.iterrows():
-                row_index = self.results_table.rowCount()
-                self.results_table.insertRow(row_index)
-
-                for col_index in range(self.results_table.columnCount()):
-                    if col_index == 7:  # Course URL
-                        link_label = QLabel(f'<a href="{row["Course URL"]}" style="color: blue; text-decoration: underline;">Link</a>')
-                        link_label.setOpenExternalLinks(True)
-                        link_label.setAlignment(Qt.AlignCenter)
-                        self.results_table.setCellWidget(row_index, col_index, link_label)
-
-                    elif col_index == 8:  # Explanation column
-                        explanation_button = QPushButton("Click Here")
-                        explanation_button.setStyleSheet(
-                            "background-color: #40797d; color: white; font-weight: bold; padding: 5px; border-radius: 5px;"
-                        )
-                        explanation_button.clicked.connect(lambda _, e=row["Explanation"]: self.show_explanation_popup(e))
-                        self.results_table.setCellWidget(row_index, col_index, explanation_button)
-
-                    elif col_index == 9:  # University Rank
-                        rank_text = row["Rank"]
-                        rank_label = QLabel(rank_text)
-                        rank_label.setAlignment(Qt.AlignCenter)
-                        self.results_table.setCellWidget(row_index, col_index, rank_label)
-
-                    elif col_index == 0:  # Similarity Score
-                        progress_bar = QProgressBar()
-                        progress_bar.setRange(0, 100)
-                        progress_bar.setValue(int(row["similarity_score"] * 100))
-
-                        percentage = int(row["similarity_score"] * 100)
-                        color = "green" if percentage >= 50 else "orange" if percentage >= 20 else "red"
-
-                        progress_bar.setStyleSheet(f"""
-                            QProgressBar {{
-                                border-radius: 5px;
-                                text-align: center;
-                            }}
-                            QProgressBar::chunk {{
-                                background-color: {color};
-                            }}
-                        """)
-                        progress_bar.setFormat(f"{percentage}%")
-                        progress_bar.setAlignment(Qt.AlignCenter)
-                        self.results_table.setCellWidget(row_index, col_index, progress_bar)
-
-                    else:
-                        value = row[self.results.columns[col_index]]
-                        table_item = QTableWidgetItem(str(value))
-                        table_item.setTextAlignment(Qt.AlignCenter)
-                        table_item.setToolTip(str(value))  # Add tooltip for long text
-                        self.results_table.setItem(row_index, col_index, table_item)
-
-        else:
-            QMessageBox.critical(self, "Error", "Rankings data is missing or incorrectly formatted.")
-
-
-
-    def generate_dynamic_explanation(self, row):
-        """Generate explanation dynamically based on the row data."""
-        course_title = row.get("Course Title", "Unknown Course")
-        university = row.get("University Name", "Unknown University")
-        similarity_score = row.get("similarity_score", 0.0)
-
-        combined_user_input = " ".join([
-            " ".join(self.data.get('interests', [])),
-            self.data.get('hobbies', ''),
-            " ".join(self.data.get('strengths', [])),
-            self.data.get('career_goals', '')
-        ])
-
-        # Extract keywords from course title and user input
-        from sklearn.feature_extraction.text import TfidfVectorizer
-        documents = [combined_user_input, course_title]
-        vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf_matrix = vectorizer.fit_transform(documents)
-        feature_names = vectorizer.get_feature_names_out()
-        user_keywords = {feature_names[i]: tfidf_matrix[0, i] for i in range(len(feature_names)) if tfidf_matrix[0, i] > 0.1}
-        course_keywords = {feature_names[i]: tfidf_matrix[1, i] for i in range(len(feature_names)) if tfidf_matrix[1, i] > 0.1}
-
-        common_keywords = set(user_keywords.keys()).intersection(set(course_keywords.keys()))
-        if common_keywords:
-            context_match = f"This program directly matches your interest in {' and '.join(common_keywords)}."
-        else:
-            context_match = "This course offers a unique opportunity to explore new areas aligned with your aspirations."
-
-        user_input = f"your interests in {', '.join(self.data.get('interests', ['various topics']))}, " \
-                    f"your hobbies such as {self.data.get('hobbies', 'exploring new activities')}, " \
-                    f"your strengths like {', '.join(self.data.get('strengths', ['being adaptable']))}, " \
-                    f"and your career goals of {self.data.get('career_goals', 'finding a fulfilling career')}."
-
-        explanation = self.explanation_system.generate_explanation(
-            course_title=course_title,
-            university=university,
-            similarity_score=similarity_score,
-            user_input=user_input,
-            context_match=context_match
-        )
-        return explanation
-
+    def sort_order(self):
+        """Page order selected in the dropdown."""
+        if self.sorting_dropdown.currentIndex() == 1:  # Sort by Best Universities
+            return SORT_UNIVERSITY
+        return SORT_COMPATIBILITY
 
-    def sort_table(self, sort_by):
-        """Sort table based on user selection."""
-        if sort_by == "Compatibility":
-            # Sort by similarity_score descending
-            self.results = self.results.sort_values(by="similarity_score", ascending=False)
-        elif sort_by == "Best Universities":
-            # Sort by University Rank ascending
-            self.results = self.results.sort_values(by="University Rank", ascending=True)
+    def sort_results(self):
+        """Redisplay the results in the dropdown's order, served from the existing ranking."""
+        if self.results is None or self.results.empty:
+            return  # Don't attempt to sort an empty dataset
 
-        # Refresh the table display
-        self.results_table.setRowCount(0)
+        # Each page holds the next 15 most compatible courses; "Sort by Best Universities"
+        # orders them by University Rank (unranked last)
         self.results_displayed = 0
+        self.results_table.results_model.clear()
+        self.load_more_button.setVisible(True)
         self.load_more_results()
 
-    
-    def display_results(self):
-        """Display results in the table."""
-        self.results_table.setRowCount(0)
-        for _, row in self.results.iterrows():
-            row_idx = self.results_table.rowCount()
-            self.results_table.insertRow(row_idx)
-
-            for col_idx, value in enumerate(row):
-                if col_idx == 7:  # Course URL as a clickable link
-                    link = QLabel(f'<a href="{value}">Link</a>')
-                    link.setOpenExternalLinks(True)
-                    self.results_table.setCellWidget(row_idx, col_idx, link)
-                elif col_idx == 9:  # Explanation column
-                    explanation_button = QPushButton("View Explanation")
-                    explanation_button.clicked.connect(lambda: self.show_explanation_popup(row["Explanation"]))
-                    self.results_table.setCellWidget(row_idx, col_idx, explanation_button)
-                else:
-                    self.results_table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
-                    
-
     def display_recommendations(self, inputs):
         """Generate and display results, ensuring rankings are included beforehand."""
-        
-        # Debugging: Print inputs received
-        print("Debug: Inputs received in ResultsPage:", inputs)
-
-        # Combine user inputs into a single text input for the recommendation engine
-        combined_input = " ".join(
-            [
-                str(inputs.get('interests', '')).strip(),
-                str(inputs.get('hobbies', '')).strip(),
-                str(inputs.get('strengths', '')).strip(),
-                str(inputs.get('career_goals', '')).strip()
-            ]
-        ).strip()
-
-        # Fallback if combined input is empty
-        if not combined_input:
-            combined_input = "general interests and goals"
-
-        # Debugging: Print the combined input
-        print("Debug: Combined input for recommendations:", combined_input)
-
-        # Calculate UCAS points based on grades
-        ucas_points = self.calculate_ucas_points(inputs.get('grades', []))
-        print(f"Debug: Calculated UCAS points: {ucas_points}")  # Debugging
-
-        # Get course recommendations
-        self.results = self.recommend_courses(combined_input, ucas_points)
-
-        # **Ensure university rankings are preloaded and merged BEFORE displaying the table**
-        if "Rank" not in self.results.columns:
-            self.results = self.results.merge(
-                self.rankings_df, left_on="University Name", right_on="University", how="left"
-            )
-
-        # **Fill missing rankings with a default high value and convert to appropriate format**
-        self.results["Rank"] = self.results["Rank"].fillna(999).astype(float)
-
-        # **Ensure rank formatting is done before rendering**
-        self.results["Rank"] = self.results["Rank"].apply(
-            lambda x: ">131" if x == 999 else int(x)
-        )
+        logger.debug("Running a query for questionnaire sections: %s", ", ".join(sorted(inputs)))
+        self.data = inputs
 
-        # Reset display
+        # Reset display while the query runs in the background
+        self.ranked = None
+        self.results = None
         self.results_displayed = 0
-        self.results_table.setRowCount(0)
+        self.results_table.results_model.clear()
+        self.results_table.setVisible(False)
+        self.load_more_button.setVisible(False)
+        self.busy_indicator.setVisible(True)
+        self.query_runner.submit(self.run_query, inputs)
+
+    def run_query(self, inputs):
+        """Rank the catalog for the inputs; runs on a worker thread, so it must not touch widgets."""
+        # Only the first batch is materialised now; more are ranked on demand
+        ranked = get_engine().recommend(inputs)
+        return ranked, ranked.page(0, self.batch_size)
+
+    def show_recommendations(self, query_result):
+        """Display the first batch of a finished query."""
+        self.ranked, self.results = query_result
+        self.busy_indicator.setVisible(False)
 
         # Check if recommendations are available
         if self.results.empty:
@@ -491,9 +235,7 @@ class ResultsPage(QWidget):
             self.results_table.setVisible(False)
             self.load_more_button.setVisible(False)
         else:
-            # Debugging: Print the first few rows of results
-            print("Debug: Top results after merging rankings:")
-            print(self.results.head())
+            logger.debug("Query ranked %d courses", len(self.ranked))
 
             # Display the results
             self.results_table.setVisible(True)
@@ -501,70 +243,6 @@ class ResultsPage(QWidget):
             self.load_more_results()
 
 
-    def calculate_ucas_points(self, grades):
-        ucas_table = {1: 16, 2: 24, 3: 32, 4: 40, 5: 48, 6: 56}
-        total_points = 0
-
-        for grade_entry in grades:
-            grade = grade_entry["grade"]
-            confidence_factor = grade_entry["confidence"]
-            grade_points = ucas_table.get(grade, 0)
-            adjusted_points = grade_points * confidence_factor
-            total_points += adjusted_points
-
-        return total_points
-
-    def recommend_courses(self, combined_input, ucas_points=None):
-        """Recommend courses based on inputs."""
-        if ucas_points is not None:
-            self.df = self.df[
-                self.df['UCAS Tariff Points']
-                .fillna(0)
-                .astype(float)
-                .le(ucas_points)
-            ]
-
-        selected_durations = self.data.get('preferences', {}).get('durations', [])
-        if selected_durations:
-            self.df = self.df[self.df['Duration'].isin(selected_durations)]
-
-        selected_qualifications = self.data.get('preferences', {}).get('qualifications', [])
-        if selected_qualifications:
-            self.df = self.df[self.df['Qualification'].isin(selected_qualifications)]
-
-        if self.df.empty:
-            return pd.DataFrame()
-
-        # Calculate similarity scores
-        filtered_tfidf_matrix = self.vectorizer.transform(self.df['cleaned_description'])
-        user_input_vector = self.vectorizer.transform([combined_input.lower()])
-        similarities = cosine_similarity(user_input_vector, filtered_tfidf_matrix)[0]
-        self.df['similarity_score'] = similarities
-
-        # Load university rankings
-        university_rankings = pd.read_csv("UK_University_Rankings_-_Full_Inclusive_List.csv")
-        university_rankings.columns = university_rankings.columns.str.strip()
-        university_rankings = university_rankings.set_index("University")["Average Rank"].to_dict()
-
-        # Map rankings to the main dataframe
-        self.df["University Rank"] = self.df["University Name"].map(university_rankings).fillna(float("inf"))
-
-        # Sort data initially by similarity score and rank
-        recommendations = self.df.drop_duplicates(subset=["Course Title", "University Name"])
-        recommendations = recommendations.sort_values(
-            by=["similarity_score", "University Rank"], ascending=[False, True]
-        )
-
-        # Set correct column order
-        recommendations = recommendations[
-            ["similarity_score", "Course Title", "University Name", "Duration",
-            "Qualification", "Study Mode", "UCAS Tariff Points", "Course URL", "University Rank"]
-        ]
-        recommendations["Explanation"] = ""  # Add Explanation at the end
-
-        return recommendations
-
-
 
     def show_explanation_popup(self, explanation):
         """Show the explanation in a popup dialog."""
@@ -584,82 +262,25 @@ class ResultsPage(QWidget):
 
         dialog.exec_()
 
+    def fetch_results(self, start, count):
+        """Materialise ranked results start to start + count in the selected order (no re-scoring)."""
+        sort = self.sort_order()
+        if start == 0 and count == len(self.results) and sort == SORT_COMPATIBILITY:
+            return self.results  # The first page came with the query
+        return self.ranked.page(start, count, sort)
+
     def load_more_results(self):
-        """Load more results incrementally, adding explanations dynamically."""
+        """Load the next batch of results into the table model."""
         end_index = self.results_displayed + self.batch_size
+        page = self.fetch_results(self.results_displayed, self.batch_size)
 
-        print(f"Displaying results from index {self.results_displayed} to {end_index}")
-        print(self.results.iloc[self.results_displayed:end_index])
-
-        for _, row in self.results.iloc[self.results_displayed:end_index].iterrows():
-            row_index = self.results_table.rowCount()
-            self.results_table.insertRow(row_index)
-
-            for col_index in range(self.results_table.columnCount()):
-                if col_index == 7:  # Course URL column
-                    link_label = QLabel(f'<a href="{row["Course URL"]}" style="color: blue; text-decoration: underline;">Link</a>')
-                    link_label.setOpenExternalLinks(True)
-                    link_label.setAlignment(Qt.AlignCenter)
-                    self.results_table.setCellWidget(row_index, col_index, link_label)
-
-                elif col_index == 9:  # University Rank column
-                    rank_value = row.get("Rank", "N/A")
-
-                    # **Fix: Handle ">131" properly**
-                    if isinstance(rank_value, str) and rank_value == ">131":
-                        rank_text = ">131"
-                    elif pd.isna(rank_value) or rank_value == "N/A":
-                        rank_text = "N/A"
-                    else:
-                        try:
-                            rank_text = str(int(float(rank_value)))
-                        except ValueError:
-                            rank_text = "N/A"  # Fallback in case of unexpected values
-
-                    rank_item = QTableWidgetItem(rank_text)
-                    rank_item.setTextAlignment(Qt.AlignCenter)
-                    rank_item.setToolTip(rank_text)
-                    self.results_table.setItem(row_index, col_index, rank_item)
-
-                elif col_index == 8:  # Explanation column
-                    explanation_button = QPushButton("Click Here")
-                    explanation_button.setStyleSheet(
-                        "background-color: #40797d; color: white; font-weight: bold; padding: 5px; border-radius: 5px;"
-                    )
-                    explanation_button.clicked.connect(lambda _, e=row["Explanation"]: self.show_explanation_popup(e))
-                    self.results_table.setCellWidget(row_index, col_index, explanation_button)
-
-                elif col_index == 0:  # Similarity Score column
-                    progress_bar = QProgressBar()
-                    progress_bar.setRange(0, 100)
-                    progress_bar.setValue(int(row["similarity_score"] * 100))
-
-                    percentage = int(row["similarity_score"] * 100)
-                    color = "green" if percentage >= 50 else "orange" if percentage >= 20 else "red"
-
-                    progress_bar.setStyleSheet(f"""
-                        QProgressBar {{
-                            border-radius: 5px;
-                            text-align: center;
-                        }}
-                        QProgressBar::chunk {{
-                            background-color: {color};
-                        }}
-                    """)
-                    progress_bar.setFormat(f"{percentage}%")
-                    progress_bar.setAlignment(Qt.AlignCenter)
-                    self.results_table.setCellWidget(row_index, col_index, progress_bar)
-
-                else:
-                    value = row[self.results.columns[col_index]]
-                    table_item = QTableWidgetItem(str(value))
-                    table_item.setTextAlignment(Qt.AlignCenter)
-                    table_item.setToolTip(str(value))  # Add tooltip for long text
-                    self.results_table.setItem(row_index, col_index, table_item)
+        logger.debug("Displaying results %d to %d", self.results_displayed, end_index)
 
+        with stage_timer("render"):
+            self.results_table.results_model.append_results(page)
         self.results_displayed = end_index
 
-        if self.results_displayed >= len(self.results):
+        if self.results_displayed >= len(self.ranked):
             self.load_more_button.setVisible(False)
 
 
@@ -667,5 +288,6 @@ class ResultsPage(QWidget):
 
     def get_another_recommendation(self):
         """Return to the start page."""
+        self.query_runner.cancel()
         self.parent.reset_all_data()
         self.parent.setCurrentWidget(self.parent.start_page)
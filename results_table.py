@@ -0,0 +1,191 @@
+"""
+Model/view results table shared by both results pages.
+
+Results are held column-wise in a QAbstractTableModel. Item delegates paint
+the compatibility bar, the course link and the explanation button, so the
+table creates no per-row widgets: only the rows on screen are painted, and
+loading more results only appends to the model.
+"""
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QRect, Qt, QUrl, pyqtSignal
+from PyQt5.QtGui import QColor, QDesktopServices, QFont, QPainter
+from PyQt5.QtWidgets import QStyle, QStyledItemDelegate, QStyleOptionViewItem, QTableView
+from recommendation_engine import RESULT_COLUMNS, UNRANKED
+
+HEADER_LABELS = [
+    "Compatibility", "Course Title", "University Name", "Duration",
+    "Qualification", "Study Mode", "UCAS Points", "Course URL", "Explanation", "University Rank"
+]
+
+SCORE_COLUMN = RESULT_COLUMNS.index("similarity_score")
+URL_COLUMN = RESULT_COLUMNS.index("Course URL")
+EXPLANATION_COLUMN = RESULT_COLUMNS.index("Explanation")
+RANK_COLUMN = RESULT_COLUMNS.index("Rank")
+
+THEME_COLOR = "#40797d"
+
+
+def score_percentage(score):
+    return int(score * 100)
+
+
+def rank_text(rank):
+    """Display text for a university rank; unranked universities show as ">131"."""
+    try:
+        rank = int(float(rank))
+    except (TypeError, ValueError):
+        return "N/A"
+    return ">131" if rank == UNRANKED else str(rank)
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """Table model over the columns of a results DataFrame."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.columns = [[] for _ in RESULT_COLUMNS]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(RESULT_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADER_LABELS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        value = self.columns[column][index.row()]
+
+        if role == Qt.UserRole:
+            return value  # Raw value for delegates and click handling
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            if column == SCORE_COLUMN:
+                return f"{score_percentage(value)}%"
+            if column == URL_COLUMN:
+                return "Link" if role == Qt.DisplayRole else str(value)
+            if column == EXPLANATION_COLUMN:
+                return "Click Here" if role == Qt.DisplayRole else None
+            if column == RANK_COLUMN:
+                return rank_text(value)
+            return str(value)
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.columns = [[] for _ in RESULT_COLUMNS]
+        self.endResetModel()
+
+    def append_results(self, results):
+        """Append the rows of a results DataFrame."""
+        if len(results) == 0:
+            return
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(results) - 1)
+        for values, column in zip(self.columns, RESULT_COLUMNS):
+            values.extend(results[column].tolist())
+        self.endInsertRows()
+
+
+class CellDelegate(QStyledItemDelegate):
+    """Base delegate that draws the item background, then lets subclasses paint the content."""
+
+    def paint(self, painter, option, index):
+        style_option = QStyleOptionViewItem(option)
+        self.initStyleOption(style_option, index)
+        style_option.text = ""
+        widget = option.widget
+        style = widget.style() if widget is not None else None
+        if style is not None:
+            style.drawControl(QStyle.CE_ItemViewItem, style_option, painter, widget)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.paint_content(painter, option.rect, index)
+        painter.restore()
+
+    def paint_content(self, painter, rect, index):
+        raise NotImplementedError
+
+
+class ScoreBarDelegate(CellDelegate):
+    """Compatibility bar coloured green/orange/red by score."""
+
+    def paint_content(self, painter, rect, index):
+        percentage = score_percentage(index.data(Qt.UserRole))
+        color = "green" if percentage >= 50 else "orange" if percentage >= 20 else "red"
+
+        bar = rect.adjusted(6, 12, -6, -12)
+        painter.setPen(QColor("#bbbbbb"))
+        painter.setBrush(QColor("white"))
+        painter.drawRoundedRect(bar, 5, 5)
+
+        filled = QRect(bar)
+        filled.setWidth(int(bar.width() * min(max(percentage, 0), 100) / 100))
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(color))
+        painter.drawRoundedRect(filled, 5, 5)
+
+        painter.setPen(QColor("black"))
+        painter.drawText(bar, Qt.AlignCenter, f"{percentage}%")
+
+
+class LinkDelegate(CellDelegate):
+    """Underlined "Link" text; clicking it opens the course page."""
+
+    def paint_content(self, painter, rect, index):
+        font = QFont(painter.font())
+        font.setUnderline(True)
+        painter.setFont(font)
+        painter.setPen(QColor("blue"))
+        painter.drawText(rect, Qt.AlignCenter, "Link")
+
+
+class ButtonDelegate(CellDelegate):
+    """Painted "Click Here" button; clicking it shows the explanation."""
+
+    def paint_content(self, painter, rect, index):
+        button = rect.adjusted(6, 8, -6, -8)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QColor(THEME_COLOR))
+        painter.drawRoundedRect(button, 5, 5)
+
+        font = QFont(painter.font())
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor("white"))
+        painter.drawText(button, Qt.AlignCenter, "Click Here")
+
+
+class ResultsTableView(QTableView):
+    explanation_requested = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.results_model = ResultsTableModel(self)
+        self.setModel(self.results_model)
+
+        self.setItemDelegateForColumn(SCORE_COLUMN, ScoreBarDelegate(self))
+        self.setItemDelegateForColumn(URL_COLUMN, LinkDelegate(self))
+        self.setItemDelegateForColumn(EXPLANATION_COLUMN, ButtonDelegate(self))
+
+        self.setMouseTracking(True)  # For the pointing-hand cursor over clickable cells
+        self.clicked.connect(self.on_clicked)
+
+    def on_clicked(self, index):
+        if index.column() == URL_COLUMN:
+            QDesktopServices.openUrl(QUrl(str(index.data(Qt.UserRole))))
+        elif index.column() == EXPLANATION_COLUMN:
+            self.explanation_requested.emit(str(index.data(Qt.UserRole)))
+
+    def mouseMoveEvent(self, event):
+        index = self.indexAt(event.pos())
+        clickable = index.isValid() and index.column() in (URL_COLUMN, EXPLANATION_COLUMN)
+        self.viewport().setCursor(Qt.PointingHandCursor if clickable else Qt.ArrowCursor)
+        super().mouseMoveEvent(event)
@@ -0,0 +1,140 @@
+"""
+Timers and counters for the stages of a recommendation query.
+
+Code wraps each stage in `with stage_timer("score"):`. The elapsed time goes
+into a per-stage latency histogram, with one observation per timed call. A
+batch therefore records one "score" observation per sparse product, plus one
+per profile ranked from it. The stages are:
+
+- preprocess: query text cleaning
+- encode: TF-IDF transform
+- filter: candidate rows from the profile's filters
+- score: posting-list accumulation
+- top_k: ranked selection
+- join: catalog rows and university ranks for the results
+- explain: matched terms and explanation text
+- render: the results table or the JSON response
+
+Counters record events such as the number of queries scored by kind.
+
+The numbers are per process. GET /metrics in app.py serves them in the
+Prometheus text format, so with several gunicorn workers a scrape reflects
+whichever worker answers it. The GUI can show them in a developer overlay
+(see metrics_overlay.py).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+STAGES = ["preprocess", "encode", "filter", "score", "top_k", "join", "explain", "render"]
+BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]  # Seconds
+METRIC_PREFIX = "course_recommender"
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets, as Prometheus exposes them."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot counts observations above every bucket
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the given quantile (the maximum for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class StageMetrics:
+    """Thread-safe stage histograms and labelled counters."""
+
+    def __init__(self, stages=STAGES):
+        self.lock = threading.Lock()
+        self.histograms = {stage: Histogram() for stage in stages}
+        self.counters = {}  # (name, label value) -> count
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, label=None, amount=1):
+        """Add to a counter, e.g. increment("scored_queries", "paragraph")."""
+        with self.lock:
+            self.counters[name, label] = self.counters.get((name, label), 0) + amount
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        """Summary per stage: count, mean, p95 and max in milliseconds."""
+        with self.lock:
+            return {
+                stage: {
+                    "count": histogram.count,
+                    "mean_ms": histogram.total / histogram.count * 1000 if histogram.count else 0.0,
+                    "p95_ms": histogram.quantile(0.95) * 1000,
+                    "max_ms": histogram.max * 1000,
+                }
+                for stage, histogram in self.histograms.items()
+            }
+
+    def prometheus_text(self):
+        """The histograms and counters in the Prometheus text exposition format."""
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Time spent per query stage.", f"# TYPE {name} histogram"]
+        with self.lock:
+            for stage, histogram in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total:.9f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+            for counter in sorted({counter for counter, _ in self.counters}):
+                full_name = f"{METRIC_PREFIX}_{counter}_total"
+                lines.append(f"# TYPE {full_name} counter")
+                for (other, label), value in sorted(self.counters.items(), key=lambda item: str(item[0])):
+                    if other == counter:
+                        labels = f'{{kind="{label}"}}' if label is not None else ""
+                        lines.append(f"{full_name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {stage: Histogram() for stage in self.histograms}
+            self.counters = {}
+
+
+# Process-wide metrics shared by the engine, the API and the GUI
+metrics = StageMetrics()
+
+
+def stage_timer(stage):
+    """Context manager timing a block as one observation of a stage."""
+    return metrics.timer(stage)
@@ -2,7 +2,8 @@ from PyQt5.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QPushButton, QMessageBox, QDialog
 )
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QFont
+from PyQt5.QtGui import QFont
+from image_cache import ScaledBackground
 
 
 class StartPage(QWidget):
@@ -16,7 +17,7 @@ class StartPage(QWidget):
 
         # Background image label
         self.background_label = QLabel(self)
-        self.original_pixmap = QPixmap("back17.png")  # Replace with your image file
+        self.background = ScaledBackground(self.background_label, "back17.png")  # Replace with your image file
 
         # Light white box container
         self.overlay_container = QWidget(self)
@@ -51,12 +52,8 @@ class StartPage(QWidget):
 
     def resize_background_image(self):
         """Resize the background image to fit the window while maintaining aspect ratio."""
-        if not self.original_pixmap.isNull():
-            scaled_pixmap = self.original_pixmap.scaled(
-                self.width(), self.height(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
-            )
-            self.background_label.setPixmap(scaled_pixmap)
-            self.background_label.setFixedSize(self.size())
+        self.background.fit(self.size())
+        self.background_label.setFixedSize(self.size())
 
     def update_overlay_position_and_size(self):
         """Update the position and size of the overlay box dynamically."""
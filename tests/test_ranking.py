@@ -0,0 +1,107 @@
+"""
+Regression tests for top-k selection: select_top_k, InvertedIndex.top_k (MaxScore)
+and RecommendationEngine.deduplicate, each checked against a brute-force full sort.
+
+Run from the repository root:
+
+    python -m pytest -q
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from inverted_index import InvertedIndex
+from ranking import select_top_k
+from recommendation_engine import RecommendationEngine
+
+
+def brute_force_order(scores, tie_break):
+    """Every position ordered by score (descending), tie_break (ascending), then position."""
+    return np.lexsort((np.arange(scores.size), tie_break, -scores))
+
+
+def synthetic_matrix(seed, rows=300, terms=40):
+    """
+    Sparse (rows x terms) matrix of small dyadic weights, so sums are exact and
+    score ties are real ties rather than rounding accidents.
+    """
+    rng = np.random.default_rng(seed)
+    matrix = sparse.random(rows, terms, density=0.08, format="csr", random_state=rng)
+    matrix.data = rng.integers(1, 5, matrix.data.size) / 4.0
+    return matrix
+
+
+def query(terms, weights, term_count):
+    return sparse.csr_matrix((weights, (np.zeros(len(terms), dtype=int), terms)), shape=(1, term_count))
+
+
+@pytest.mark.parametrize("k", [0, 1, 5, 50, 299, 300, 1000])
+def test_select_top_k_matches_full_sort(k):
+    rng = np.random.default_rng(k)
+    scores = rng.integers(0, 6, 300).astype(float)  # Heavy score ties
+    tie_break = rng.integers(0, 10, 300)  # Ties within the ties
+
+    expected = brute_force_order(scores, tie_break)[:k]
+    np.testing.assert_array_equal(select_top_k(scores, tie_break, k), expected)
+
+
+def test_select_top_k_empty_scores():
+    assert select_top_k(np.empty(0), np.empty(0, dtype=int), 10).size == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("k", [1, 10, 40, 10_000])
+def test_top_k_matches_brute_force(seed, k):
+    matrix = synthetic_matrix(seed)
+    index = InvertedIndex.from_matrix(matrix)
+    rng = np.random.default_rng(seed + 100)
+    tie_break = rng.integers(0, 20, matrix.shape[0])
+    allowed = rng.random(matrix.shape[0]) < 0.8
+    terms = rng.choice(matrix.shape[1], 6, replace=False)
+    query_vector = query(terms, rng.integers(1, 4, terms.size) / 2.0, matrix.shape[1])
+
+    for mask in (None, allowed):
+        scores = (matrix @ query_vector.T).toarray().ravel()
+        if mask is not None:
+            scores[~mask] = 0.0
+        matched = np.flatnonzero(scores > 0)
+        expected = matched[brute_force_order(scores[matched], tie_break[matched])][:k]
+
+        rows, top_scores = index.top_k(query_vector, k, tie_break, mask)
+        np.testing.assert_array_equal(rows, expected)
+        np.testing.assert_array_equal(top_scores, scores[expected])
+
+
+def test_top_k_empty_query():
+    matrix = synthetic_matrix(0)
+    index = InvertedIndex.from_matrix(matrix)
+    empty = sparse.csr_matrix((1, matrix.shape[1]))
+
+    rows, scores = index.top_k(empty, 10, np.zeros(matrix.shape[0], dtype=int))
+    assert rows.size == 0 and scores.size == 0
+
+
+def test_top_k_unmatched_terms():
+    matrix = synthetic_matrix(0).tolil()
+    matrix[:, 3] = 0  # A term no course uses
+    index = InvertedIndex.from_matrix(matrix.tocsr())
+
+    rows, scores = index.top_k(query([3], [1.0], matrix.shape[1]), 10, np.zeros(matrix.shape[0], dtype=int))
+    assert rows.size == 0 and scores.size == 0
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_deduplicate_keeps_first_row_per_course(seed):
+    rng = np.random.default_rng(seed)
+    course_group = rng.integers(0, 60, 200)
+    engine = SimpleNamespace(
+        course_group=course_group,
+        in_duplicate_group=np.bincount(course_group)[course_group] > 1,
+    )
+    rows = np.flatnonzero(rng.random(200) < 0.6)
+
+    _, first = np.unique(course_group[rows], return_index=True)
+    expected = rows[np.sort(first)]
+    np.testing.assert_array_equal(RecommendationEngine.deduplicate(engine, rows), expected)
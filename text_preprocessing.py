@@ -0,0 +1,125 @@
+"""
+Reusable text preprocessing for course descriptions and queries.
+
+The pipeline matches the original NLTK one (lowercase, tokenize, keep
+alphanumeric tokens that are not English stopwords, lemmatize), but the
+expensive pieces are set up once instead of on every call:
+
+- Tokenizing uses one precompiled regular expression. A word joined to
+  another by a hyphen or period ("e-mail", "3.5") stays a single token and is
+  then dropped by the alphanumeric filter, as it was with word_tokenize.
+- The stopword list is loaded once into a frozenset.
+- Lemmas are looked up through a bounded per-token LRU cache. Catalog text is
+  highly repetitive, so nearly every lookup after the first few thousand rows
+  is a cache hit.
+
+preprocess_many() runs the pipeline over a whole column, optionally in a
+process pool over row chunks for large catalog builds.
+
+NLTK is imported on first use and never downloads anything: the stopwords
+and wordnet corpora must already be installed, either in NLTK's usual data
+directories or in an nltk_data folder shipped next to the app:
+
+    python -m nltk.downloader -d nltk_data stopwords wordnet
+"""
+import os
+import re
+import sys
+from functools import lru_cache
+
+NLTK_DATA_DIR = "nltk_data"  # Corpora bundled with the app
+REQUIRED_CORPORA = ("corpora/stopwords", "corpora/wordnet")
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:[-.][^\W_]+)*")
+
+LEMMA_CACHE_SIZE = 100_000  # Distinct tokens kept in the lemma cache
+CHUNK_SIZE = 5_000  # Rows per process-pool task
+MIN_PARALLEL_ROWS = 20_000  # Below this, starting worker processes costs more than it saves
+
+
+def ensure_corpora():
+    """
+    Make the bundled corpora visible to NLTK and check every required corpus is installed locally.
+
+    Raises:
+        LookupError: If a corpus is missing; nothing is downloaded.
+    """
+    import nltk
+
+    app_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+    bundled = os.path.join(app_dir, NLTK_DATA_DIR)
+    if os.path.isdir(bundled) and bundled not in nltk.data.path:
+        nltk.data.path.insert(0, bundled)
+
+    missing = []
+    for resource in REQUIRED_CORPORA:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(resource.split("/")[-1])
+    if missing:
+        raise LookupError(
+            f"NLTK corpora not installed: {', '.join(missing)}. Install them offline with "
+            f"'python -m nltk.downloader -d {NLTK_DATA_DIR} {' '.join(missing)}'."
+        )
+
+
+class TextPreprocessor:
+    """Tokenizer, stopword set and lemma cache shared across calls."""
+
+    def __init__(self, lemma_cache_size=LEMMA_CACHE_SIZE):
+        self.lemma_cache_size = lemma_cache_size
+        self.stop_words = None
+        self.lemmatize = None
+
+    def setup(self):
+        """Load the stopword list and lemmatizer on first use."""
+        if self.lemmatize is None:
+            ensure_corpora()
+            from nltk.corpus import stopwords
+            from nltk.stem import WordNetLemmatizer
+
+            self.stop_words = frozenset(stopwords.words("english"))
+            self.lemmatize = lru_cache(maxsize=self.lemma_cache_size)(WordNetLemmatizer().lemmatize)
+
+    def __call__(self, text):
+        """Lowercase, tokenize, drop stopwords/punctuation and lemmatize a piece of text."""
+        self.setup()
+        stop_words, lemmatize = self.stop_words, self.lemmatize
+        return " ".join(
+            lemmatize(token)
+            for token in TOKEN_PATTERN.findall(text.lower())
+            if token.isalnum() and token not in stop_words
+        )
+
+
+# Process-wide preprocessor; each pool worker gets its own copy
+preprocess_text = TextPreprocessor()
+
+
+def preprocess_chunk(texts):
+    """Preprocess a chunk of texts in a pool worker."""
+    return [preprocess_text(text) for text in texts]
+
+
+def preprocess_many(texts, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Preprocess a sequence of texts, in a process pool when it is large enough to pay off.
+
+    Args:
+        texts (list): Texts to preprocess.
+        workers (int): Pool size; None or 1 preprocesses in this process.
+        chunk_size (int): Rows sent to a worker per task.
+
+    Returns:
+        list: Preprocessed texts in input order.
+    """
+    texts = list(texts)
+    if not workers or workers <= 1 or len(texts) < MIN_PARALLEL_ROWS:
+        return preprocess_chunk(texts)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks), os.cpu_count() or 1)) as pool:
+        return [text for chunk in pool.map(preprocess_chunk, chunks) for text in chunk]
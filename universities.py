@@ -0,0 +1,114 @@
+"""
+Canonical university ids shared by the catalog, the rankings and the regions.
+
+The catalog, the rankings CSV and the region list spell some universities
+differently, e.g. "University of the West of England" vs "University of the
+West of England (UWE Bristol)". Every name is resolved once, when the index
+is built, to an integer id:
+- names are compared case-, accent- and punctuation-insensitively, ignoring "the";
+- a name with a parenthesised part also answers to the parts on either side;
+- UNIVERSITY_ALIASES covers variants no rule can derive (renames, short names).
+
+Per-university data (rankings, region membership) is then kept in arrays
+indexed by id, so attaching it to catalog rows is a single gather.
+"""
+import re
+import unicodedata
+
+import numpy as np
+
+# Alternative name -> the spelling used in regions.py
+UNIVERSITY_ALIASES = {
+    "London School of Economics and Political Science": "London School of Economics",
+    "LSE": "London School of Economics",
+    "Glyndwr University": "Wrexham Glyndŵr University",
+    "Wrexham University": "Wrexham Glyndŵr University",
+    "UCL": "University College London",
+    "KCL": "King's College London",
+    "Queen Mary, University of London": "Queen Mary University of London",
+    "Solent University Southampton": "Solent University",
+}
+
+
+def name_key(name):
+    """Comparison key for a university name, e.g. "King’s College London" -> "kings college london"."""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii").lower()
+    text = text.replace("&", " and ")
+    text = re.sub(r"['’]", "", text)
+    words = re.findall(r"[a-z0-9]+", text)
+    return " ".join(word for word in words if word != "the")
+
+
+def name_keys(name):
+    """Keys a name answers to: the whole name first, then its parts around a parenthesis."""
+    keys = [name_key(name)]
+    match = re.match(r"^(.*?)\s*\((.*?)\)\s*(.*)$", str(name))
+    if match:
+        outer = f"{match.group(1)} {match.group(3)}"
+        keys += [name_key(outer), name_key(match.group(2))]
+    return [key for key in keys if key]
+
+
+class UniversityTable:
+    """Integer id per university with alias resolution; ids are positions in `names`."""
+
+    def __init__(self, names=(), aliases=UNIVERSITY_ALIASES):
+        self.names = []  # Id -> canonical name (the first spelling seen)
+        self.ids = {}  # Name key -> id
+        self.aliases = {name_key(alias): name_key(name) for alias, name in aliases.items()}
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, name):
+        """Id of a university name, or -1 when it is not in the table."""
+        for key in name_keys(name):
+            key = self.aliases.get(key, key)
+            if key in self.ids:
+                return self.ids[key]
+        return -1
+
+    def add(self, name):
+        """Id of a university name, giving it a new id when no known name matches."""
+        university_id = self.lookup(name)
+        if university_id < 0:
+            university_id = len(self.names)
+            self.names.append(str(name).strip())
+            keys = name_keys(name)
+            self.ids[self.aliases.get(keys[0], keys[0])] = university_id
+            for key in keys[1:]:
+                self.ids.setdefault(key, university_id)  # Parts never take over another name
+        return university_id
+
+    def encode(self, values):
+        """
+        Ids for a column of university names, adding unknown names to the table.
+
+        Each distinct spelling is resolved once; missing entries get -1.
+        """
+        import pandas as pd
+
+        codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+        unique_ids = np.array([self.add(name) for name in uniques] + [-1], dtype=np.int32)
+        return unique_ids[codes]  # Code -1 picks the trailing -1
+
+    def lookup_many(self, names):
+        """Ids of the known names among `names`."""
+        ids = (self.lookup(name) for name in names)
+        return np.array([university_id for university_id in ids if university_id >= 0], dtype=np.int32)
+
+
+def table_array(size, fill, dtype, ids, values):
+    """
+    Per-university array with one extra trailing slot, filled with `fill`.
+
+    The extra slot is what id -1 (no university) gathers, so it keeps `fill`.
+    When an id occurs more than once in `ids`, its last value wins (as with a dict).
+    """
+    table = np.full(size + 1, fill, dtype=dtype)
+    ids = np.asarray(ids)
+    known = ids >= 0
+    table[ids[known]] = np.asarray(values, dtype=dtype)[known]
+    return table